@@ -13,6 +13,13 @@ const COOLDOWN_MS = 60 * 60 * 1000; // 1 hour cooldown
 const UPLOAD_LOCK_KEY = "hc_upload_in_progress";
 const NEXT_PROMPT_AT_KEY = "hc_next_prompt_at";
 const SESSION_KEY = "session_id";
+// The server keeps only this many items per upload / room join, so don't send more.
+const UPLOAD_MAX_ITEMS = 5000;
+const JOIN_MAX_ITEMS = 4000;
+// Server history revision after our last upload, and when we read history for it;
+// the next upload then sends only items visited since (a delta on top of that revision).
+const HISTORY_REV_KEY = "hc_history_rev";
+const HISTORY_SINCE_KEY = "hc_history_since";
 
 function sanitizeHistoryItems(items) {
   const out = [];
@@ -86,6 +93,29 @@ function dedupeSanitizedItems(items) {
   return unique;
 }
 
+// One JSON item per line, gzipped when the browser can (CompressionStream).
+async function encodeHistoryBody(items) {
+  const ndjson = items.map((it) => JSON.stringify(it)).join("\n") + "\n";
+  if (typeof CompressionStream === "undefined") {
+    return { body: ndjson, headers: { "Content-Type": "application/x-ndjson" } };
+  }
+  const gz = new Blob([ndjson]).stream().pipeThrough(new CompressionStream("gzip"));
+  return {
+    body: await new Response(gz).arrayBuffer(),
+    headers: { "Content-Type": "application/x-ndjson", "Content-Encoding": "gzip" },
+  };
+}
+
+async function postHistory(url, items, params) {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params || {})) {
+    if (value) query.set(key, value);
+  }
+  const qs = query.toString();
+  const { body, headers } = await encodeHistoryBody(items);
+  return fetch(qs ? `${url}?${qs}` : url, { method: "POST", headers, body });
+}
+
 function shuffleInPlace(items) {
   for (let i = items.length - 1; i > 0; i--) {
     const j = Math.floor(Math.random() * (i + 1));
@@ -123,6 +153,35 @@ async function setSessionId(id) {
   await chrome.storage.local.set({ [SESSION_KEY]: id });
 }
 
+async function collectHistory(startTime, maxResults) {
+  const batchSize = Math.max(200, Math.min(Number(maxResults) || 5000, 20000));
+  const items = await fetchAllHistory({ startTime, batchSize });
+  return shuffleInPlace(dedupeSanitizedItems(sanitizeHistoryItems(items)));
+}
+
+// Upload only what was visited since the last upload. Returns null when the server
+// no longer has that revision (409) or we never uploaded, so the caller sends everything.
+async function uploadHistoryDelta(url, sessionId, maxResults) {
+  const st = await chrome.storage.local.get([HISTORY_REV_KEY, HISTORY_SINCE_KEY]);
+  const baseRev = st[HISTORY_REV_KEY];
+  const since = Number(st[HISTORY_SINCE_KEY] || 0);
+  if (!sessionId || !baseRev || !since) return null;
+
+  const fetchedAt = Date.now();
+  const fresh = await collectHistory(since, maxResults);
+  if (!fresh.length) {
+    return { res: null, json: { ok: true, session_id: sessionId, history_rev: baseRev, total_in: 0 }, items: fresh, fetchedAt: since };
+  }
+  const res = await postHistory(url, fresh.slice(0, UPLOAD_MAX_ITEMS), {
+    session_id: sessionId,
+    delta: "1",
+    base_rev: baseRev,
+  });
+  if (res.status === 409) return null;
+  const json = await res.json().catch(() => ({}));
+  return { res, json, items: fresh, fetchedAt };
+}
+
 chrome.runtime.onMessage.addListener((message, _sender, sendResponse) => {
   (async () => {
     if (message?.type === "hc-session-state") {
@@ -147,6 +206,8 @@ chrome.runtime.onMessage.addListener((message, _sender, sendResponse) => {
         return;
       }
       await setSessionId(sess);
+      // The page uploaded its own selection, so our last revision is gone.
+      await chrome.storage.local.remove([HISTORY_REV_KEY, HISTORY_SINCE_KEY]);
       await setCooldown(COOLDOWN_MS);
       sendResponse({ ok: true, sessionId: sess });
       return;
@@ -185,14 +246,9 @@ chrome.runtime.onMessage.addListener((message, _sender, sendResponse) => {
         const apiBase = message.apiBase || "https://historycourt.lol";
         url = `${apiBase.replace(/\/$/, "")}/api/roulette/room/${encodeURIComponent(roomId)}/join`;
 
-        const res = await fetch(url, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({
-            name,
-            history: shuffled,
-            session_id: (message.sessionId || "").trim(),
-          }),
+        const res = await postHistory(url, shuffled.slice(0, JOIN_MAX_ITEMS), {
+          name,
+          session_id: (message.sessionId || "").trim(),
         });
         const json = await res.json().catch(() => ({}));
         if (!res.ok) {
@@ -222,7 +278,15 @@ chrome.runtime.onMessage.addListener((message, _sender, sendResponse) => {
           body: JSON.stringify({ session_id: sessionId }),
         });
         const json = await res.json().catch(() => ({}));
-        await chrome.storage.local.remove([SESSION_KEY, "hc_session_id", NEXT_PROMPT_AT_KEY, UPLOAD_LOCK_KEY, "hc_review_payload"]);
+        await chrome.storage.local.remove([
+          SESSION_KEY,
+          "hc_session_id",
+          NEXT_PROMPT_AT_KEY,
+          UPLOAD_LOCK_KEY,
+          HISTORY_REV_KEY,
+          HISTORY_SINCE_KEY,
+          "hc_review_payload",
+        ]);
         if (!res.ok) {
           sendResponse({ ok: false, error: json.error || `HTTP ${res.status}` });
           return;
@@ -251,45 +315,38 @@ chrome.runtime.onMessage.addListener((message, _sender, sendResponse) => {
 
     let url = null;
     try {
-      const startTime = 0; // fetch everything
-      const batchSize = Math.max(200, Math.min(Number(message.maxResults) || 5000, 20000));
-
-      const items = await fetchAllHistory({ startTime, batchSize });
-      const sanitized = sanitizeHistoryItems(items);
-      const deduped = dedupeSanitizedItems(sanitized);
-      const shuffled = shuffleInPlace(deduped);
-
       if (reviewOnly) {
         // Skip cooldown so the banner can re-open quickly after delete; just clear lock below.
-        sendResponse({ ok: true, history: shuffled });
+        sendResponse({ ok: true, history: await collectHistory(0, message.maxResults) });
         return;
       }
 
       const apiBase = message.apiBase || "https://historycourt.lol";
       url = `${apiBase.replace(/\/$/, "")}/api/upload-history`;
+      const sessionId = (message.sessionId || "").trim();
 
-      const res = await fetch(url, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          history: shuffled,
-          session_id: (message.sessionId || "").trim(),
-        }),
-      });
-
-      const json = await res.json().catch(() => ({}));
+      let upload = await uploadHistoryDelta(url, sessionId, message.maxResults);
+      if (!upload) {
+        const fetchedAt = Date.now();
+        const items = await collectHistory(0, message.maxResults); // fetch everything
+        const res = await postHistory(url, items.slice(0, UPLOAD_MAX_ITEMS), { session_id: sessionId });
+        const json = await res.json().catch(() => ({}));
+        upload = { res, json, items, fetchedAt };
+      }
+      const { res, json } = upload;
 
-      if (!res.ok || !json.session_id) {
+      if ((res && !res.ok) || !json.session_id) {
         // on failure, back off a bit so it won’t keep prompting
         await setCooldown(10 * 60 * 1000); // 10 min cooldown on failure
-        sendResponse({ ok: false, error: json.error || `HTTP ${res.status}`, url });
+        sendResponse({ ok: false, error: json.error || `HTTP ${res?.status}`, url });
         return;
       }
 
+      await chrome.storage.local.set({ [HISTORY_REV_KEY]: json.history_rev || "", [HISTORY_SINCE_KEY]: upload.fetchedAt });
       // success: long cooldown so it doesn't reprompt
       await setCooldown(COOLDOWN_MS);
       if (json.session_id) await setSessionId(json.session_id);
-      sendResponse({ ok: true, ...json, url, history: shuffled, session_id: json.session_id });
+      sendResponse({ ok: true, ...json, url, history: upload.items, session_id: json.session_id });
     } catch (e) {
       await setCooldown(10 * 60 * 1000);
       sendResponse({ ok: false, error: String(e), url });
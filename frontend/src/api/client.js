@@ -19,8 +19,13 @@ async function request(path, options = {}) {
   return data;
 }
 
-export function fetchTypeMeta() {
-  return request("/api/type-map");
+// The compact form sends each host's type as an index into type_names; expand it
+// back to the host -> type name map that lib/history.js expects.
+export async function fetchTypeMeta() {
+  const { type_names: typeNames = [], type_map: compact = {}, ...data } = await request("/api/type-map?format=compact");
+  const typeMap = {};
+  for (const host in compact) typeMap[host] = typeNames[compact[host]];
+  return { ...data, type_map: typeMap };
 }
 
 export function fetchSessionTags(sessionId) {
@@ -34,6 +39,10 @@ export function createCase(payload) {
   });
 }
 
+export function fetchJob(jobId) {
+  return request(`/api/job/${jobId}`);
+}
+
 export function editCase(caseId, payload) {
   return request(`/api/case/${caseId}/edit`, {
     method: "POST",
@@ -56,10 +65,14 @@ export function submitGuess(caseId, round, selection) {
   });
 }
 
-export function uploadHistory(history, sessionId) {
+// Pass the tagger_version from /api/type-map when `history` items carry tags from
+// classifyHistory(); the server then keeps those tags instead of re-tagging.
+// It goes in the query string, which the server reads before the streamed body.
+export function uploadHistory(history, sessionId, taggerVersion) {
   const payload = { history };
   if (sessionId) payload.session_id = sessionId;
-  return request("/api/upload-history", {
+  const query = taggerVersion ? `?tagger_version=${encodeURIComponent(taggerVersion)}` : "";
+  return request(`/api/upload-history${query}`, {
     method: "POST",
     body: JSON.stringify(payload),
   });
@@ -96,6 +109,12 @@ export function fetchRouletteRoom(roomId) {
   return request(`/api/roulette/room/${roomId}`);
 }
 
+// Long-poll: resolves when the room's version passes sinceVersion (with the full
+// room status and changed: true) or after the server's wait limit ({ changed: false }).
+export function waitRouletteRoom(roomId, sinceVersion, { signal } = {}) {
+  return request(`/api/roulette/room/${roomId}/wait?since_version=${sinceVersion}`, { signal });
+}
+
 export function joinRouletteRoom(roomId, payload) {
   return request(`/api/roulette/room/${roomId}/join`, {
     method: "POST",
@@ -1,8 +1,11 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { useParams } from "react-router-dom";
-import { createCase, editCase, fetchSessionTags } from "../api/client";
+import { createCase, editCase, fetchJob, fetchSessionTags } from "../api/client";
 import PageFrame from "../components/PageFrame";
 import { SESSION_KEY } from "../config";
+const JOB_POLL_MS = 1500;
+const JOB_MAX_POLLS = 120;
+
 const statusColor = {
   muted: "text-slate-500",
   good: "text-emerald-600",
@@ -110,9 +113,43 @@ export default function CaseBuilderPage() {
       session_id: sessionId,
       rounds: Math.max(3, Math.min(15, Number(roundsInput) || 8)),
       tags: Array.from(selectedTags),
+      async: true,
     };
   }
 
+  // The server answers create-case with draft rounds right away; AI rounds replace them when the job is done.
+  async function followJob(jobId, caseId, doneMsg) {
+    for (let i = 0; i < JOB_MAX_POLLS; i += 1) {
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+      let job;
+      try {
+        job = await fetchJob(jobId);
+      } catch {
+        continue;
+      }
+      if (job.status === "done") {
+        setCaseState((prev) => (prev.id === caseId ? { ...prev, rounds: job.rounds || prev.rounds } : prev));
+        setGenStatus({ msg: doneMsg, tone: "good" });
+        return;
+      }
+      if (job.status === "failed") {
+        setGenStatus({ msg: "AI polish failed; keeping the draft rounds.", tone: "bad" });
+        return;
+      }
+      if (job.status === "superseded") return;
+    }
+  }
+
+  function applyCreatedCase(res, doneMsg) {
+    setCaseState({ id: res.case_id, playUrl: res.play_url, rounds: res.rounds || [] });
+    if (res.job_id) {
+      setGenStatus({ msg: "Draft rounds ready. AI is polishing them...", tone: "muted" });
+      followJob(res.job_id, res.case_id, doneMsg);
+    } else {
+      setGenStatus({ msg: doneMsg, tone: "good" });
+    }
+  }
+
   async function handleGenerate() {
     setGenStatus({ msg: "Generating rounds...", tone: "muted" });
     startOverlay();
@@ -120,8 +157,7 @@ export default function CaseBuilderPage() {
       const payload = makeGeneratePayload();
       const res = await createCase(payload);
       if (!res.ok) throw new Error(res.error || "Failed to generate");
-      setCaseState({ id: res.case_id, playUrl: res.play_url, rounds: res.rounds || [] });
-      setGenStatus({ msg: "New rounds ready. Share after you finish edits.", tone: "good" });
+      applyCreatedCase(res, "New rounds ready. Share after you finish edits.");
     } catch (err) {
       const msg = err.message || "AI generation failed.";
       setGenStatus({ msg, tone: "bad" });
@@ -162,9 +198,8 @@ export default function CaseBuilderPage() {
       const payload = makeGeneratePayload();
       const res = await createCase(payload);
       if (!res.ok) throw new Error(res.error || "Failed to regenerate");
-      setCaseState({ id: res.case_id, playUrl: res.play_url, rounds: res.rounds || [] });
+      applyCreatedCase(res, "Fresh case ready.");
       setPreviewStatus({ msg: "All rounds regenerated.", tone: "good" });
-      setGenStatus({ msg: "Fresh case ready.", tone: "good" });
     } catch (err) {
       const msg = err.message || "AI regeneration failed.";
       setPreviewStatus({ msg, tone: "bad" });
@@ -7,7 +7,7 @@ import { SESSION_KEY, STORAGE_KEYS } from "../config";
 
 export default function ReviewPage() {
   const navigate = useNavigate();
-  const [meta, setMeta] = useState({ tagDefs: [], typeMap: {}, typeToTag: {} });
+  const [meta, setMeta] = useState({ tagDefs: [], typeMap: {}, typeToTag: {}, fallbackTag: "", taggerVersion: "" });
   const [loading, setLoading] = useState(true);
   const [missing, setMissing] = useState(false);
   const [items, setItems] = useState([]);
@@ -25,6 +25,8 @@ export default function ReviewPage() {
           tagDefs: data.tag_defs || [],
           typeMap: data.type_map || {},
           typeToTag: data.type_to_tag || {},
+          fallbackTag: data.fallback_tag || "",
+          taggerVersion: data.tagger_version || "",
         });
       })
       .catch((err) => setStatus({ msg: err.message, tone: "bad" }));
@@ -195,7 +197,11 @@ export default function ReviewPage() {
     setUploading(true);
     setStatus({ msg: "Uploading selection...", tone: "muted" });
     try {
-      const res = await uploadHistory(filteredItems, sessionId || undefined);
+      // The server files what we call "uncategorized" under its fallback tag.
+      const upload = meta.fallbackTag
+        ? filteredItems.map((it) => (it.tag === "uncategorized" ? { ...it, tag: meta.fallbackTag } : it))
+        : filteredItems;
+      const res = await uploadHistory(upload, sessionId || undefined, meta.taggerVersion || undefined);
       if (!res.ok) throw new Error(res.error || "Upload failed");
       try {
         if (res.session_id) {
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { Link, useNavigate, useParams } from "react-router-dom";
-import { createRouletteRoom, fetchRouletteRoom, startRouletteRoom } from "../api/client";
+import { createRouletteRoom, fetchRouletteRoom, startRouletteRoom, waitRouletteRoom } from "../api/client";
 import PageFrame from "../components/PageFrame";
 
 export default function RouletteRoomPage() {
@@ -36,25 +36,35 @@ export default function RouletteRoomPage() {
     }
   }, [routeRoomId]);
 
-  // Poll room status
+  // Follow room status: one fetch, then long-polls that return when the lobby changes
   useEffect(() => {
     if (!roomId) return;
     let active = true;
+    const controller = new AbortController();
     const run = async () => {
-      try {
-        const data = await fetchRouletteRoom(roomId);
-        if (!active) return;
-        setRoom(data);
-      } catch (err) {
-        if (!active) return;
-        setStatus({ msg: err.message, tone: "bad" });
+      let version = -1;
+      while (active) {
+        try {
+          const data =
+            version < 0
+              ? await fetchRouletteRoom(roomId)
+              : await waitRouletteRoom(roomId, version, { signal: controller.signal });
+          if (!active) return;
+          version = data.version ?? version;
+          if (data.changed === false) continue;
+          setRoom(data);
+          if (data.status && data.status !== "open") return;
+        } catch (err) {
+          if (!active) return;
+          setStatus({ msg: err.message, tone: "bad" });
+          await new Promise((resolve) => setTimeout(resolve, 2000));
+        }
       }
     };
     run();
-    const t = setInterval(run, 2000);
     return () => {
       active = false;
-      clearInterval(t);
+      controller.abort();
     };
   }, [roomId]);
 
@@ -1,27 +1,52 @@
+import gzip
 import json
 import os
+import queue
+import random
 import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from flask import Flask, jsonify, request, send_from_directory, Response
+from flask import Flask, g, jsonify, request, send_from_directory, Response
 from flask_cors import CORS
 
+from ingest import (
+    JSONStreamReader,
+    UnsupportedEncoding,
+    decoded_stream,
+    read_ndjson_streaming,
+    read_object_streaming,
+)
 from rounds import (
+    curate_history_ai_checked,
+    curate_weird_pool,
+    curator_cache_key,
+    get_fake_titles,
     make_rounds,
-    make_rounds_ai_two_stage,
+    make_rounds_ai_from_real_items,
     make_roulette_rounds,
 )
 from tagging import (
+    FALLBACK_TAG,
     TAG_DEFS,
     TAG_LOOKUP,
     TAG_MIN_COUNT,
-    TYPE_MAP,
     TYPE_TO_TAG,
-    filter_history_by_tags,
+    detect_tag,
+    get_type_map,
+    host_tag_cache_stats,
+    item_features,
     summarize_items_by_tag,
+    summarize_tag_host_counts,
+    tag_history_item,
     tag_history_items,
+    tagger_version,
 )
-from utils import gen_id, utc_now_iso
+from titles import title_cache_stats
+from utils import TTLCache, gen_id, utc_now_iso
 
 # ============================================================
 # App setup
@@ -48,26 +73,121 @@ def load_dotenv_if_present():
 
 load_dotenv_if_present()
 
+
+def warm_up():
+    """
+    Load the lazily-initialized resources (type map, lie titles, openai SDK, numpy) now.
+    Meant for pre-fork servers, e.g. gunicorn --preload with HISTORYCOURT_WARM_UP=1,
+    so workers inherit them instead of paying for them on their first request.
+    """
+    get_type_map()
+    get_fake_titles()
+    for fmt in TYPE_MAP_FORMATS:
+        type_map_bodies(fmt)
+    for module in ("openai", "numpy"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
 DB_PATH = os.environ.get("HISTORYCOURT_DB", "historycourt.db")
 SESSION_KEY = os.environ.get("SESSION_KEY", "session_id")
+# Upload bodies are parsed as they stream in (see read_history_upload); this caps the bytes read.
+UPLOAD_MAX_BYTES = int(os.environ.get("HISTORYCOURT_UPLOAD_MAX_BYTES", str(64 * 1024 * 1024)))
+# Uploads that echo the current tagger_version keep their client-side tags; this
+# fraction of them is re-tagged anyway, and one disagreement re-tags the whole upload.
+TRUSTED_TAG_SAMPLE = float(os.environ.get("HISTORYCOURT_TRUSTED_TAG_SAMPLE", "0.05"))
+# Browser cache lifetime of /api/type-map; after it, clients revalidate with the ETag.
+TYPE_MAP_MAX_AGE = int(os.environ.get("HISTORYCOURT_TYPE_MAP_MAX_AGE", "3600"))
 REACT_DIST = os.path.join(os.path.dirname(__file__), "static", "react")
 REACT_INDEX = os.path.join(REACT_DIST, "index.html")
 
 # ============================================================
 # DB helpers
 # ============================================================
-def db():
-    conn = sqlite3.connect(DB_PATH)
+DB_POOL_SIZE = int(os.environ.get("HISTORYCOURT_DB_POOL_SIZE", "16"))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("HISTORYCOURT_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_MMAP_SIZE = int(os.environ.get("HISTORYCOURT_DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+
+# Parsed rounds/players of published cases and roulette games, keyed ("case", id, version)
+# and ("game", id). Case edits bump cases.version, so every worker stops serving the old
+# copy at once; superseded versions just age out.
+PLAY_CACHE_MAX_BYTES = int(os.environ.get("HISTORYCOURT_PLAY_CACHE_BYTES", str(32 * 1024 * 1024)))
+PLAY_CACHE_TTL = float(os.environ.get("HISTORYCOURT_PLAY_CACHE_TTL", "120"))
+play_cache = TTLCache(max_bytes=PLAY_CACHE_MAX_BYTES, ttl=PLAY_CACHE_TTL)
+
+# Lobby long-polls (GET /api/roulette/room/<id>/wait) are held at most ROOM_WAIT_MAX seconds.
+# Joins and starts in this process wake waiters at once; changes made by other worker
+# processes are noticed by re-reading the room version every ROOM_WAIT_RECHECK seconds
+# (once per room per process; 0 disables this for single-process servers).
+ROOM_WAIT_MAX = float(os.environ.get("HISTORYCOURT_ROOM_WAIT_MAX", "25"))
+ROOM_WAIT_RECHECK = float(os.environ.get("HISTORYCOURT_ROOM_WAIT_RECHECK", "5"))
+
+# Spare AI rounds per session for edit_case regenerate/append (see take_pool_rounds).
+ROUND_POOL_BATCH = int(os.environ.get("HISTORYCOURT_ROUND_POOL_BATCH", "10"))
+ROUND_POOL_LOW = int(os.environ.get("HISTORYCOURT_ROUND_POOL_LOW", "3"))
+
+# Stage-1 curator results persisted in curator_cache (see curate_cached).
+CURATOR_CACHE_MAX_AGE = float(os.environ.get("HISTORYCOURT_CURATOR_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+CURATOR_CACHE_MAX_BYTES = int(os.environ.get("HISTORYCOURT_CURATOR_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Idle connections, most recently used first. Each one is borrowed by at most
+# one app context at a time, so sharing them across threads is safe.
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+
+def connect_db():
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=256,
+    )
     conn.row_factory = sqlite3.Row
+    # WAL lets readers proceed while a writer commits; NORMAL is durable enough under WAL.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
     return conn
 
 
+def db():
+    """
+    Connection for the current app context, borrowed from the pool on first use
+    and handed back by release_db() at teardown. Callers must not close it.
+    """
+    conn = g.get("db")
+    if conn is None:
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            conn = connect_db()
+        g.db = conn
+    return conn
+
+
+@app.teardown_appcontext
+def release_db(_exc=None):
+    conn = g.pop("db", None)
+    if conn is None:
+        return
+    try:
+        # Uncommitted work is discarded, as closing the connection used to do.
+        if conn.in_transaction:
+            conn.rollback()
+        _db_pool.put_nowait(conn)
+    except (sqlite3.Error, queue.Full):
+        conn.close()
+
+
 def error_response(code: str, status: int = 400):
     return jsonify({"ok": False, "error": code}), status
 
 
 def init_db():
-    conn = db()
+    conn = connect_db()
     cur = conn.cursor()
     cur.execute("""
       CREATE TABLE IF NOT EXISTS sessions (
@@ -76,16 +196,94 @@ def init_db():
         history_json TEXT NOT NULL
       )
     """)
+    # One row per uploaded history item; sessions.history_json is legacy and kept empty.
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS history_items (
+        session_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        host TEXT NOT NULL,
+        title TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        visit_count INTEGER NOT NULL DEFAULT 1,
+        last_visit_time NUMERIC,
+        clean_title TEXT,
+        clean_tag TEXT,
+        generic INTEGER,
+        words INTEGER,
+        PRIMARY KEY (session_id, idx),
+        FOREIGN KEY(session_id) REFERENCES sessions(id)
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_history_items_session_tag ON history_items(session_id, tag)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_history_items_session_host ON history_items(session_id, host)")
     cur.execute("""
       CREATE TABLE IF NOT EXISTS cases (
         id TEXT PRIMARY KEY,
         session_id TEXT NOT NULL,
         created_at TEXT NOT NULL,
         rounds_json TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
         FOREIGN KEY(session_id) REFERENCES sessions(id)
       )
     """)
 
+    # One row per case round; cases.rounds_json is legacy and kept empty.
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS case_rounds (
+        case_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        cards_json TEXT NOT NULL,
+        lie_index INTEGER NOT NULL,
+        tag TEXT,
+        topic TEXT,
+        PRIMARY KEY (case_id, idx),
+        FOREIGN KEY(case_id) REFERENCES cases(id)
+      )
+    """)
+
+    # Stage-1 curator output keyed by curator_cache_key(); see curate_cached()
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS curator_cache (
+        session_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        items_json TEXT NOT NULL,
+        nbytes INTEGER NOT NULL,
+        created_ts REAL NOT NULL,
+        used_ts REAL NOT NULL,
+        PRIMARY KEY (session_id, key)
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_curator_cache_used ON curator_cache(used_ts)")
+
+    # Pre-generated spare rounds, consumed oldest first by edit_case
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS round_pool (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        pool_key TEXT NOT NULL,
+        cards_json TEXT NOT NULL,
+        lie_index INTEGER NOT NULL,
+        tag TEXT,
+        topic TEXT,
+        created_at TEXT NOT NULL
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_round_pool_session ON round_pool(session_id, pool_key, id)")
+
+    # Background AI generation jobs (see submit_job)
+    cur.execute("""
+      CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        case_id TEXT,
+        status TEXT NOT NULL,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+      )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_case ON jobs(case_id)")
+
     # Multiplayer roulette games (whose history is this?)
     cur.execute("""
       CREATE TABLE IF NOT EXISTS roulette_games (
@@ -104,7 +302,8 @@ def init_db():
         picks INTEGER NOT NULL DEFAULT 3,
         status TEXT NOT NULL DEFAULT 'open',
         game_id TEXT,
-        started_at TEXT
+        started_at TEXT,
+        version INTEGER NOT NULL DEFAULT 0
       )
     """)
     cur.execute("""
@@ -114,13 +313,128 @@ def init_db():
         name TEXT NOT NULL,
         history_json TEXT NOT NULL,
         created_at TEXT NOT NULL,
+        pool_json TEXT,
+        item_count INTEGER NOT NULL DEFAULT 0,
         PRIMARY KEY (room_id, player_id),
         FOREIGN KEY(room_id) REFERENCES roulette_rooms(id)
       )
     """)
+    migrate_history_features(conn)
+    migrate_case_columns(conn)
+    migrate_room_columns(conn)
+    # Covers the lobby query, so status polls skip rows (and their history blobs) entirely
+    # (after the migration, which may add item_count)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_room_players_lobby "
+        "ON roulette_room_players(room_id, created_at, player_id, name, item_count)"
+    )
+    migrate_history_blobs(conn)
+    migrate_case_round_blobs(conn)
     conn.commit()
     conn.close()
 
+
+def migrate_history_blobs(conn):
+    """
+    Move sessions.history_json blobs written before history_items existed
+    into rows, then empty the blob. Safe to run on every startup.
+    """
+    rows = conn.execute(
+        "SELECT id, history_json FROM sessions WHERE history_json NOT IN ('', '[]')"
+    ).fetchall()
+    for row in rows:
+        try:
+            items = json.loads(row["history_json"] or "[]")
+        except ValueError:
+            items = []
+        already = conn.execute(
+            "SELECT 1 FROM history_items WHERE session_id = ? LIMIT 1", (row["id"],)
+        ).fetchone()
+        if not already:
+            items = [
+                {**it, "tag": it.get("tag") or detect_tag(it.get("host"), it.get("title"))}
+                for it in items
+                if isinstance(it, dict) and it.get("host") and it.get("title")
+            ]
+            save_history_items(conn, row["id"], items)
+        conn.execute("UPDATE sessions SET history_json = '[]' WHERE id = ?", (row["id"],))
+
+
+
+HISTORY_FEATURE_COLUMNS = (("clean_title", "TEXT"), ("clean_tag", "TEXT"), ("generic", "INTEGER"), ("words", "INTEGER"))
+
+
+def migrate_history_features(conn):
+    """
+    Add the item_features() columns to history_items tables created before them
+    and fill them in for rows stored without. Safe to run on every startup.
+    """
+    have = {r["name"] for r in conn.execute("PRAGMA table_info(history_items)")}
+    for name, decl in HISTORY_FEATURE_COLUMNS:
+        if name not in have:
+            conn.execute(f"ALTER TABLE history_items ADD COLUMN {name} {decl}")
+    while True:
+        rows = conn.execute(
+            "SELECT rowid, host, title FROM history_items WHERE clean_title IS NULL LIMIT 1000"
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for r in rows:
+            f = item_features(r["host"], r["title"])
+            updates.append((f["cleanTitle"], f["cleanTag"], int(f["generic"]), f["words"], r["rowid"]))
+        conn.executemany(
+            "UPDATE history_items SET clean_title = ?, clean_tag = ?, generic = ?, words = ? WHERE rowid = ?",
+            updates,
+        )
+
+
+def migrate_case_columns(conn):
+    """
+    Add cases.version (see bump_case_version) to tables created before it.
+    """
+    if "version" not in {r["name"] for r in conn.execute("PRAGMA table_info(cases)")}:
+        conn.execute("ALTER TABLE cases ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+
+def migrate_room_columns(conn):
+    """
+    Add room columns to tables created before them: roulette_rooms.version, and
+    roulette_room_players.pool_json (NULL means not curated yet, which room start
+    handles) and item_count, filled in from the stored history.
+    """
+    if "version" not in {r["name"] for r in conn.execute("PRAGMA table_info(roulette_rooms)")}:
+        conn.execute("ALTER TABLE roulette_rooms ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    have = {r["name"] for r in conn.execute("PRAGMA table_info(roulette_room_players)")}
+    if "pool_json" not in have:
+        conn.execute("ALTER TABLE roulette_room_players ADD COLUMN pool_json TEXT")
+    if "item_count" not in have:
+        conn.execute("ALTER TABLE roulette_room_players ADD COLUMN item_count INTEGER NOT NULL DEFAULT 0")
+        conn.execute(
+            "UPDATE roulette_room_players SET item_count = "
+            "CASE WHEN json_valid(history_json) THEN json_array_length(history_json) ELSE 0 END"
+        )
+
+
+def migrate_case_round_blobs(conn):
+    """
+    Move cases.rounds_json arrays written before case_rounds existed into rows.
+    """
+    rows = conn.execute(
+        "SELECT id, rounds_json FROM cases WHERE rounds_json NOT IN ('', '[]')"
+    ).fetchall()
+    for row in rows:
+        already = conn.execute(
+            "SELECT 1 FROM case_rounds WHERE case_id = ? LIMIT 1", (row["id"],)
+        ).fetchone()
+        if not already:
+            try:
+                rounds = json.loads(row["rounds_json"] or "[]")
+            except ValueError:
+                rounds = []
+            insert_case_rounds(conn, row["id"], rounds)
+        conn.execute("UPDATE cases SET rounds_json = '[]' WHERE id = ?", (row["id"],))
+
 # ============================================================
 # Helpers
 # ============================================================
@@ -144,24 +458,609 @@ def set_session_cookie(resp, session_id):
     return resp
 
 
-def get_case_with_history(case_id):
+def _visit_time(value):
+    # lastVisitTime is client-supplied; keep anything SQLite can store as a scalar.
+    return value if isinstance(value, (int, float, str)) and not isinstance(value, bool) else None
+
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def read_history_upload(max_history):
+    """
+    Parse a history upload straight off request.stream, tagging the first
+    max_history raw items as they are decoded; the rest are counted but not decoded. Accepts a
+    {"history": [...], ...} JSON body or NDJSON (one item per line, other fields
+    in the query string), either optionally gzip/zstd Content-Encoded.
+
+    If the client sends the current tagger_version in the query string (a body
+    field counts only when it precedes "history"), item tags it computed from /api/type-map are kept as is,
+    except for a TRUSTED_TAG_SAMPLE spot check; any disagreement there re-tags
+    everything on the server.
+
+    Returns (fields, items, total_in, bytes_in, tags_trusted); fields is {} if the
+    body is malformed, and fields["history"] is True when history items were sent.
+    Raises UnsupportedEncoding for unknown encodings.
+    """
+    items = []
+    fields = {}
+    total_in = 0
+    trusted = None  # decided on the first item, once any body field before it is known
+
+    def keep(h):
+        nonlocal total_in, trusted
+        total_in += 1
+        if trusted is None:
+            claimed_version = request.args.get("tagger_version") or fields.get("tagger_version")
+            trusted = bool(claimed_version) and claimed_version == tagger_version()
+        claimed = h.get("tag") if trusted and isinstance(h, dict) else None
+        if not isinstance(claimed, str) or claimed not in TAG_LOOKUP:
+            item = tag_history_item(h, features=True)
+        elif random.random() >= TRUSTED_TAG_SAMPLE:
+            item = tag_history_item(h, features=True, trusted_tag=claimed)
+        else:
+            item = tag_history_item(h, features=True)
+            if item is not None and item["tag"] != claimed:
+                app.logger.info("Client tag %r != %r for %s; re-tagging upload", claimed, item["tag"], item["host"])
+                trusted = False
+                retag_history_items(items)
+        if item is not None:
+            items.append(item)
+
+    ndjson = request.mimetype in NDJSON_MIMETYPES
+    if not (ndjson or request.is_json):
+        return {}, items, 0, 0, False
+    stream = decoded_stream(request.stream, request.content_encoding)
+    reader = JSONStreamReader(stream, max_bytes=UPLOAD_MAX_BYTES)
+    try:
+        if ndjson:
+            read_ndjson_streaming(reader, keep, max_items=max_history)
+            fields.update(request.args.to_dict(), history=True)
+        else:
+            read_object_streaming(reader, "history", keep, fields, max_items=max_history)
+    except (ValueError, OSError, EOFError, zlib.error) as e:
+        app.logger.info("Rejected history upload after %d bytes: %s", reader.bytes_read, e)
+        return {}, [], total_in + reader.items_skipped, reader.bytes_read, False
+    return fields, items, total_in + reader.items_skipped, reader.bytes_read, bool(trusted)
+
+
+def retag_history_items(items):
+    """Recompute tag and item_features() of tagged items in place."""
+    for it in items:
+        it["tag"] = detect_tag(it["host"], it["title"])
+        it.update(item_features(it["host"], it["title"], it["tag"]))
+
+
+@app.errorhandler(UnsupportedEncoding)
+def unsupported_encoding(_e):
+    return error_response("unsupported_encoding", 415)
+
+
+def _history_item_row(session_id, idx, it):
+    f = it if "cleanTitle" in it else item_features(it["host"], it["title"])
+    return (
+        session_id,
+        idx,
+        it["host"],
+        it["title"],
+        it["tag"],
+        int(it.get("visitCount") or 1),
+        _visit_time(it.get("lastVisitTime")),
+        f["cleanTitle"],
+        f["cleanTag"],
+        int(f["generic"]),
+        f["words"],
+    )
+
+
+def _insert_history_rows(conn, rows):
+    conn.executemany(
+        "INSERT INTO history_items (session_id, idx, host, title, tag, visit_count, last_visit_time, "
+        "clean_title, clean_tag, generic, words) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def save_history_items(conn, session_id, items):
+    """
+    Replace a session's stored history with tagged items (see tag_history_items),
+    along with their item_features(), computed here if the items don't carry them.
+    """
+    conn.execute("DELETE FROM history_items WHERE session_id = ?", (session_id,))
+    _insert_history_rows(conn, [_history_item_row(session_id, idx, it) for idx, it in enumerate(items)])
+
+
+def merge_history_items(conn, session_id, items, max_items):
+    """
+    Merge a delta upload of tagged items into a session's stored history.
+    Items whose (host, title) is already stored only update its visit count and
+    last visit time; new ones go in front (lowest idx), so load order is newest
+    delta first. The oldest-positioned items beyond max_items are dropped.
+    Returns (added, updated).
+    """
+    stored = {}
+    first_idx = 0
+    for r in conn.execute("SELECT idx, host, title FROM history_items WHERE session_id = ?", (session_id,)):
+        stored[(r["host"], r["title"])] = r["idx"]
+        first_idx = min(first_idx, r["idx"])
+    rows, updates, added = [], [], set()
+    for it in items:
+        key = (it["host"], it["title"])
+        if key in added:
+            continue
+        if key in stored:
+            visited = _visit_time(it.get("lastVisitTime"))
+            updates.append((int(it.get("visitCount") or 1), visited, visited, session_id, stored[key]))
+            continue
+        first_idx -= 1
+        added.add(key)
+        rows.append(_history_item_row(session_id, first_idx, it))
+    # Scalar MAX() is NULL if either side is, hence the COALESCE fallbacks.
+    conn.executemany(
+        "UPDATE history_items SET visit_count = MAX(visit_count, ?), "
+        "last_visit_time = COALESCE(MAX(last_visit_time, ?), last_visit_time, ?) "
+        "WHERE session_id = ? AND idx = ?",
+        updates,
+    )
+    _insert_history_rows(conn, rows)
+    if len(stored) + len(added) > max_items:
+        conn.execute(
+            "DELETE FROM history_items WHERE session_id = ? AND idx >= ("
+            "SELECT idx FROM history_items WHERE session_id = ? ORDER BY idx LIMIT 1 OFFSET ?)",
+            (session_id, session_id, max_items),
+        )
+    return len(rows), len(updates)
+
+
+def load_history_items(conn, session_id, tags=None):
+    """
+    Stored history in upload order, optionally only items whose tag is in `tags`
+    (served by the (session_id, tag) index).
+    """
+    sql = (
+        "SELECT host, title, tag, visit_count, last_visit_time, clean_title, clean_tag, generic, words "
+        "FROM history_items WHERE session_id = ?"
+    )
+    params = [session_id]
+    if tags:
+        sql += f" AND tag IN ({','.join('?' * len(tags))})"
+        params.extend(tags)
+    rows = conn.execute(sql + " ORDER BY idx", params).fetchall()
+    return [
+        {
+            "host": r["host"],
+            "title": r["title"],
+            "tag": r["tag"],
+            "lastVisitTime": r["last_visit_time"],
+            "visitCount": r["visit_count"],
+            "cleanTitle": r["clean_title"],
+            "cleanTag": r["clean_tag"],
+            "generic": bool(r["generic"]),
+            "words": r["words"],
+        }
+        for r in rows
+    ]
+
+
+def load_generation_history(conn, session_id, selected_tags):
+    """
+    History fed to round generation: items in the selected tags, or the whole
+    history when nothing is selected or nothing matches.
+    """
+    if selected_tags:
+        filtered = load_history_items(conn, session_id, selected_tags)
+        if filtered:
+            return filtered
+    return load_history_items(conn, session_id)
+
+
+def session_exists(conn, session_id):
+    return conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+
+def get_case(case_id):
     """
-    Returns (conn, case_row, history_list). Caller must close conn.
+    Returns (conn, case_row); conn is the request's pooled connection.
     """
     conn = db()
     case_row = conn.execute(
-        "SELECT session_id, rounds_json FROM cases WHERE id = ?",
+        "SELECT id, session_id FROM cases WHERE id = ?",
         (case_id,),
     ).fetchone()
     if not case_row:
-        conn.close()
-        return None, None, None
-    session_row = conn.execute(
-        "SELECT history_json FROM sessions WHERE id = ?",
-        (case_row["session_id"],),
+        return None, None
+    return conn, case_row
+
+
+def _round_params(case_id, idx, r):
+    return (
+        json.dumps(r.get("cards") or []),
+        int(r["lie_index"]),
+        r.get("tag"),
+        r.get("topic"),
+        case_id,
+        idx,
+    )
+
+
+def _row_to_round(row):
+    return {
+        "cards": json.loads(row["cards_json"]),
+        "lie_index": row["lie_index"],
+        "topic": row["topic"],
+        "tag": row["tag"],
+    }
+
+
+def insert_case_rounds(conn, case_id, rounds, start_idx=0):
+    conn.executemany(
+        "INSERT INTO case_rounds (cards_json, lie_index, tag, topic, case_id, idx) VALUES (?, ?, ?, ?, ?, ?)",
+        [_round_params(case_id, start_idx + i, r) for i, r in enumerate(rounds)],
+    )
+
+
+def replace_case_round(conn, case_id, idx, r):
+    conn.execute(
+        "UPDATE case_rounds SET cards_json = ?, lie_index = ?, tag = ?, topic = ? WHERE case_id = ? AND idx = ?",
+        _round_params(case_id, idx, r),
+    )
+
+
+def delete_case_round(conn, case_id, idx):
+    """
+    Remove one round and shift the later ones down. Indices go through negatives
+    first so no intermediate UPDATE collides with the (case_id, idx) key.
+    """
+    conn.execute("DELETE FROM case_rounds WHERE case_id = ? AND idx = ?", (case_id, idx))
+    conn.execute("UPDATE case_rounds SET idx = -idx WHERE case_id = ? AND idx > ?", (case_id, idx))
+    conn.execute("UPDATE case_rounds SET idx = -idx - 1 WHERE case_id = ? AND idx < 0", (case_id,))
+
+
+def _case_round_rows(conn, case_id):
+    return conn.execute(
+        "SELECT cards_json, lie_index, tag, topic FROM case_rounds WHERE case_id = ? ORDER BY idx",
+        (case_id,),
+    ).fetchall()
+
+
+def load_case_rounds(conn, case_id):
+    return [_row_to_round(r) for r in _case_round_rows(conn, case_id)]
+
+
+def get_published_case_rounds(case_id):
+    """
+    Rounds of a case for play traffic, read through play_cache. None if the case doesn't exist.
+    Callers must treat the returned list as read-only.
+    """
+    conn = db()
+    # One primary-key read per request keeps every worker on the latest edit.
+    row = conn.execute("SELECT version FROM cases WHERE id = ?", (case_id,)).fetchone()
+    if not row:
+        return None
+
+    def load():
+        rows = _case_round_rows(conn, case_id)
+        return [_row_to_round(r) for r in rows], sum(len(r["cards_json"]) + 64 for r in rows)
+
+    return play_cache.get_or_load(("case", case_id, row["version"]), load)
+
+
+def bump_case_version(conn, case_id):
+    """
+    Mark a case's rounds as changed, so no worker serves its cached copy any more. Caller commits.
+    """
+    conn.execute("UPDATE cases SET version = version + 1 WHERE id = ?", (case_id,))
+
+
+def case_round_cards(conn, case_id, idx):
+    """cards_json of one round (None if there is no such round), to tell whether it changed."""
+    row = conn.execute(
+        "SELECT cards_json FROM case_rounds WHERE case_id = ? AND idx = ?", (case_id, idx)
+    ).fetchone()
+    return row["cards_json"] if row else None
+
+
+def count_case_rounds(conn, case_id):
+    return conn.execute("SELECT COUNT(*) FROM case_rounds WHERE case_id = ?", (case_id,)).fetchone()[0]
+
+
+def evict_curator_cache(conn, now=None):
+    """
+    Drop curator_cache rows older than CURATOR_CACHE_MAX_AGE, then the least
+    recently used ones until the total fits CURATOR_CACHE_MAX_BYTES. Caller commits.
+    """
+    now = time.time() if now is None else now
+    conn.execute("DELETE FROM curator_cache WHERE created_ts < ?", (now - CURATOR_CACHE_MAX_AGE,))
+    conn.execute(
+        """
+        DELETE FROM curator_cache WHERE rowid IN (
+          SELECT rowid FROM (
+            SELECT rowid, SUM(nbytes) OVER (ORDER BY used_ts DESC, rowid DESC) AS running
+            FROM curator_cache
+          ) WHERE running > ?
+        )
+        """,
+        (CURATOR_CACHE_MAX_BYTES,),
+    )
+
+
+def curate_cached(conn, session_id, history, selected_tags, pick_n, seed, meta):
+    """
+    curate_history_ai() through curator_cache. The seed only varies wording, so a
+    session asking again with the same history window, tags, pick_n and model
+    reuses the stored picks instead of another curator LLM call. Heuristic picks
+    standing in for a malformed curator answer are returned but not stored.
+    """
+    key = curator_cache_key(history, allowed_tags=selected_tags, pick_n=pick_n)
+    now = time.time()
+    row = conn.execute(
+        "SELECT items_json FROM curator_cache WHERE session_id = ? AND key = ? AND created_ts >= ?",
+        (session_id, key, now - CURATOR_CACHE_MAX_AGE),
     ).fetchone()
-    history = json.loads(session_row["history_json"] or "[]") if session_row else []
-    return conn, case_row, history
+    if row:
+        conn.execute(
+            "UPDATE curator_cache SET used_ts = ? WHERE session_id = ? AND key = ?",
+            (now, session_id, key),
+        )
+        conn.commit()
+        return json.loads(row["items_json"])
+
+    curated, cacheable = curate_history_ai_checked(
+        history,
+        pick_n=pick_n,
+        seed=seed,
+        allowed_tags=selected_tags,
+        meta={**meta, "stage": "curator"},
+    )
+    if not cacheable:
+        # A malformed curator answer; ask again next time instead of pinning heuristic picks.
+        return curated
+    items_json = json.dumps(curated, ensure_ascii=False)
+    conn.execute(
+        "INSERT OR REPLACE INTO curator_cache (session_id, key, items_json, nbytes, created_ts, used_ts) VALUES (?, ?, ?, ?, ?, ?)",
+        (session_id, key, items_json, len(items_json), now, now),
+    )
+    evict_curator_cache(conn, now)
+    conn.commit()
+    return curated
+
+
+def curator_cache_stats(conn):
+    row = conn.execute("SELECT COUNT(*) AS n, COALESCE(SUM(nbytes), 0) AS b FROM curator_cache").fetchone()
+    return {
+        "entries": row["n"],
+        "bytes": row["b"],
+        "max_bytes": CURATOR_CACHE_MAX_BYTES,
+        "max_age": CURATOR_CACHE_MAX_AGE,
+    }
+
+
+def make_rounds_ai_cached(conn, session_id, history, n_rounds, seed, selected_tags, pick_n, meta):
+    """
+    Two-stage AI generation (curator -> rounds) with stage 1 served from curator_cache.
+    """
+    curated = curate_cached(conn, session_id, history, selected_tags, pick_n, seed, meta)
+    return make_rounds_ai_from_real_items(
+        curated,
+        n_rounds=n_rounds,
+        seed=seed,
+        allowed_tags=selected_tags,
+        meta={**meta, "stage": "rounds"},
+    )
+
+
+# ============================================================
+# Background jobs
+# ============================================================
+AI_WORKERS = int(os.environ.get("HISTORYCOURT_AI_WORKERS", "4"))
+AI_MAX_PENDING = int(os.environ.get("HISTORYCOURT_AI_MAX_PENDING", "32"))
+
+_ai_executor = None
+_ai_executor_lock = threading.Lock()
+_ai_slots = threading.BoundedSemaphore(AI_MAX_PENDING)
+
+# Join-time room curation (schedule_player_curation) gets its own workers and bound,
+# so busy lobbies can't fill the queue async create-case jobs need.
+ROOM_CURATE_WORKERS = int(os.environ.get("HISTORYCOURT_ROOM_CURATE_WORKERS", "2"))
+ROOM_CURATE_MAX_PENDING = int(os.environ.get("HISTORYCOURT_ROOM_CURATE_MAX_PENDING", "8"))
+_room_curate_executor = None
+_room_curate_slots = threading.BoundedSemaphore(ROOM_CURATE_MAX_PENDING)
+
+JOB_ACTIVE = ("pending", "running")
+
+
+def ai_executor():
+    global _ai_executor
+    if _ai_executor is None:
+        with _ai_executor_lock:
+            if _ai_executor is None:
+                _ai_executor = ThreadPoolExecutor(max_workers=AI_WORKERS, thread_name_prefix="ai-job")
+    return _ai_executor
+
+
+def room_curate_executor():
+    global _room_curate_executor
+    if _room_curate_executor is None:
+        with _ai_executor_lock:
+            if _room_curate_executor is None:
+                _room_curate_executor = ThreadPoolExecutor(max_workers=ROOM_CURATE_WORKERS, thread_name_prefix="room-curate")
+    return _room_curate_executor
+
+
+def _set_job_status(conn, job_id, status, error=None, only_if=JOB_ACTIVE):
+    """
+    Move a job to `status` if it is still in one of `only_if`. Returns True when it did,
+    so a job superseded by an edit or delete never writes its result.
+    """
+    cur = conn.execute(
+        f"UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status IN ({','.join('?' * len(only_if))})",
+        (status, error, utc_now_iso(), job_id, *only_if),
+    )
+    return cur.rowcount > 0
+
+
+def supersede_case_jobs(conn, case_ids):
+    """
+    Stop active jobs for these cases from overwriting them. Caller commits.
+    """
+    conn.executemany(
+        "UPDATE jobs SET status = 'superseded', updated_at = ? WHERE case_id = ? AND status IN ('pending', 'running')",
+        [(utc_now_iso(), case_id) for case_id in case_ids],
+    )
+
+
+def submit_job(kind, case_id, fn, slots=None, executor=None):
+    """
+    Record a pending job and run fn(conn, job_id) on the bounded AI pool (or the
+    given executor and slot semaphore) inside an app context. Returns the job id,
+    or None when AI_MAX_PENDING jobs are already queued or running.
+    """
+    slots = slots or _ai_slots
+    if not slots.acquire(blocking=False):
+        return None
+    job_id = gen_id(12)
+    now = utc_now_iso()
+    conn = db()
+    conn.execute(
+        "INSERT INTO jobs (id, kind, case_id, status, created_at, updated_at) VALUES (?, ?, ?, 'pending', ?, ?)",
+        (job_id, kind, case_id, now, now),
+    )
+    conn.commit()
+
+    def run():
+        try:
+            with app.app_context():
+                conn = db()
+                if not _set_job_status(conn, job_id, "running", only_if=("pending",)):
+                    conn.commit()
+                    return
+                conn.commit()
+                try:
+                    fn(conn, job_id)
+                except Exception as e:
+                    app.logger.warning("Job %s (%s) failed: %s", job_id, kind, e)
+                    conn.rollback()
+                    _set_job_status(conn, job_id, "failed", error=str(e))
+                    conn.commit()
+        finally:
+            slots.release()
+
+    try:
+        (executor or ai_executor()).submit(run)
+    except RuntimeError:
+        slots.release()
+        raise
+    return job_id
+
+
+# ============================================================
+# Round pool
+# ============================================================
+_pool_refills = set()
+_pool_refills_lock = threading.Lock()
+
+
+def round_pool_key(selected_tags, pick_n):
+    return json.dumps([sorted(selected_tags or []), int(pick_n)])
+
+
+def take_pool_rounds(conn, session_id, pool_key, count):
+    """
+    Pop up to `count` spare round rows for this session and generation settings.
+    Commits, so the caller doesn't hold a write transaction while it generates the rest;
+    hand the rows to restore_pool_rounds() if they end up unused.
+    """
+    rows = conn.execute(
+        "SELECT id, cards_json, lie_index, tag, topic, created_at FROM round_pool "
+        "WHERE session_id = ? AND pool_key = ? ORDER BY id LIMIT ?",
+        (session_id, pool_key, count),
+    ).fetchall()
+    if rows:
+        conn.executemany("DELETE FROM round_pool WHERE id = ?", [(r["id"],) for r in rows])
+        conn.commit()
+    return rows
+
+
+def restore_pool_rounds(conn, session_id, pool_key, rows):
+    """
+    Put rows from take_pool_rounds() back under their old ids, so they are still
+    consumed first. Skipped if the session was deleted meanwhile. Caller commits.
+    """
+    if not rows or not session_exists(conn, session_id):
+        return
+    conn.executemany(
+        "INSERT OR IGNORE INTO round_pool (id, session_id, pool_key, cards_json, lie_index, tag, topic, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (r["id"], session_id, pool_key, r["cards_json"], r["lie_index"], r["tag"], r["topic"], r["created_at"])
+            for r in rows
+        ],
+    )
+
+
+def count_pool_rounds(conn, session_id, pool_key):
+    return conn.execute(
+        "SELECT COUNT(*) FROM round_pool WHERE session_id = ? AND pool_key = ?",
+        (session_id, pool_key),
+    ).fetchone()[0]
+
+
+def schedule_pool_refill(conn, session_id, selected_tags, pick_n):
+    """
+    Top the session's pool up to ROUND_POOL_BATCH spare rounds in a background job
+    once it has fallen below ROUND_POOL_LOW. At most one refill per pool runs at a time.
+    Returns the job id, or None if nothing was scheduled.
+    """
+    if ROUND_POOL_BATCH <= 0:
+        return None
+    pool_key = round_pool_key(selected_tags, pick_n)
+    if count_pool_rounds(conn, session_id, pool_key) >= ROUND_POOL_LOW:
+        return None
+    with _pool_refills_lock:
+        if (session_id, pool_key) in _pool_refills:
+            return None
+        _pool_refills.add((session_id, pool_key))
+
+    def refill(job_conn, job_id):
+        try:
+            version = job_conn.execute("SELECT created_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            have = count_pool_rounds(job_conn, session_id, pool_key)
+            if not version or have >= ROUND_POOL_LOW:
+                _set_job_status(job_conn, job_id, "done")
+                job_conn.commit()
+                return
+            history = load_generation_history(job_conn, session_id, selected_tags)
+            rounds = make_rounds_ai_cached(
+                job_conn,
+                session_id,
+                history,
+                n_rounds=ROUND_POOL_BATCH - have,
+                seed=f"pool-{session_id}-{utc_now_iso()}",
+                selected_tags=selected_tags,
+                pick_n=pick_n,
+                meta={"session_id": session_id, "request": "round_pool", "job_id": job_id},
+            )
+            # Drop the batch if the history was re-uploaded or the user deleted meanwhile.
+            current = job_conn.execute("SELECT created_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if _set_job_status(job_conn, job_id, "done") and current and current["created_at"] == version["created_at"]:
+                now = utc_now_iso()
+                job_conn.executemany(
+                    "INSERT INTO round_pool (session_id, pool_key, cards_json, lie_index, tag, topic, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (session_id, pool_key, json.dumps(r.get("cards") or []), int(r["lie_index"]), r.get("tag"), r.get("topic"), now)
+                        for r in rounds
+                    ],
+                )
+            job_conn.commit()
+        finally:
+            with _pool_refills_lock:
+                _pool_refills.discard((session_id, pool_key))
+
+    job_id = submit_job("round_pool", None, refill)
+    if job_id is None:
+        with _pool_refills_lock:
+            _pool_refills.discard((session_id, pool_key))
+    return job_id
 
 
 # ============================================================
@@ -225,73 +1124,188 @@ def play(case_id):
 
 @app.post("/api/upload-history")
 def upload_history():
-    data = request.get_json(silent=True) or {}
-    history = data.get("history") if isinstance(data, dict) else None
-    session_id = (data.get("session_id") or "").strip() if isinstance(data, dict) else ""
+    # Basic sanitize + tag inference while the body streams in
+    data, cleaned, total_in, bytes_in, tags_trusted = read_history_upload(max_history=5000)
+    session_id = data.get("session_id")
+    session_id = session_id.strip() if isinstance(session_id, str) else ""
 
-    if not history or not isinstance(history, list):
+    delta = data.get("delta") in (True, 1, "1", "true")
+    # A delta may be empty: nothing new since the last upload.
+    if data.get("history") is not True or not (total_in or delta):
         return error_response("history_required", 400)
 
-    # Basic sanitize + tag inference before persisting
-    cleaned = tag_history_items(history, max_history=5000)
-    if not cleaned:
-        cleaned = []
-
     conn = db()
-    if session_id:
-        row = conn.execute("SELECT id FROM sessions WHERE id = ?", (session_id,)).fetchone()
-        if row:
-            conn.execute(
-                "UPDATE sessions SET history_json = ?, created_at = ? WHERE id = ?",
-                (json.dumps(cleaned), utc_now_iso(), session_id),
-            )
-        else:
-            conn.execute(
-                "INSERT INTO sessions (id, created_at, history_json) VALUES (?, ?, ?)",
-                (session_id, utc_now_iso(), json.dumps(cleaned)),
-            )
+    if delta:
+        # Only valid on top of the exact history the client last uploaded; one
+        # compare-and-set, so two deltas built on the same revision can't both apply.
+        base_rev = data.get("base_rev") if isinstance(data.get("base_rev"), str) else None
+        history_rev = utc_now_iso() if cleaned else base_rev
+        cur = conn.execute(
+            "UPDATE sessions SET created_at = ? WHERE id = ? AND created_at = ?",
+            (history_rev, session_id, base_rev),
+        )
+        if not session_id or cur.rowcount == 0:
+            conn.rollback()
+            return error_response("history_rev_mismatch", 409)
+        added, updated = merge_history_items(conn, session_id, cleaned, max_items=5000) if cleaned else (0, 0)
+    elif session_id and session_exists(conn, session_id):
+        history_rev = utc_now_iso()
+        conn.execute(
+            "UPDATE sessions SET history_json = '[]', created_at = ? WHERE id = ?",
+            (history_rev, session_id),
+        )
+        save_history_items(conn, session_id, cleaned)
     else:
-        session_id = gen_id(14)
+        session_id = session_id or gen_id(14)
+        history_rev = utc_now_iso()
         conn.execute(
-            "INSERT INTO sessions (id, created_at, history_json) VALUES (?, ?, ?)",
-            (session_id, utc_now_iso(), json.dumps(cleaned)),
+            "INSERT INTO sessions (id, created_at, history_json) VALUES (?, ?, '[]')",
+            (session_id, history_rev),
         )
+        save_history_items(conn, session_id, cleaned)
+    if cleaned or not delta:
+        # Picks and spare rounds drawn from the old history are stale now.
+        conn.execute("DELETE FROM curator_cache WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM round_pool WHERE session_id = ?", (session_id,))
     conn.commit()
-    conn.close()
-    resp = jsonify({"ok": True, "session_id": session_id, "total_in": len(history), "total_saved": len(cleaned)})
-    return set_session_cookie(resp, session_id)
+    body = {
+        "ok": True,
+        "session_id": session_id,
+        "history_rev": history_rev,
+        "total_in": total_in,
+        "total_saved": len(cleaned),
+        "tags_trusted": tags_trusted,
+        "bytes_in": bytes_in,
+    }
+    if delta:
+        body.update(added=added, updated=updated)
+    return set_session_cookie(jsonify(body), session_id)
 
 
 def _get_roulette_game(game_id):
-    conn = db()
-    row = conn.execute(
-        "SELECT rounds_json, players_json FROM roulette_games WHERE id = ?",
-        (game_id,),
-    ).fetchone()
+    """
+    (rounds, players) of a started game, read through play_cache; (None, None) if missing.
+    """
+    def load():
+        row = db().execute(
+            "SELECT rounds_json, players_json FROM roulette_games WHERE id = ?",
+            (game_id,),
+        ).fetchone()
+        if not row:
+            return None, 0
+        rounds = json.loads(row["rounds_json"] or "[]")
+        players = json.loads(row["players_json"] or "[]")
+        return (rounds, players), len(row["rounds_json"] or "") + len(row["players_json"] or "")
+
+    return play_cache.get_or_load(("game", game_id), load) or (None, None)
+
+
+# ============================================================
+# Room lobby change notifications
+# ============================================================
+# room_id -> [version, monotonic time it was read or bumped]; guarded by _room_changed
+_room_versions = {}
+_room_changed = threading.Condition()
+ROOM_VERSIONS_MAX = 4096
+
+
+def _record_room_version(room_id, version):
+    """Remember a room version; wake every waiter if it moved forward."""
+    now = time.monotonic()
+    with _room_changed:
+        state = _room_versions.get(room_id)
+        if state is None or version > state[0]:
+            _room_versions[room_id] = [version, now]
+            _room_changed.notify_all()
+        else:
+            state[1] = now
+        if len(_room_versions) > ROOM_VERSIONS_MAX:
+            cutoff = now - 2 * max(ROOM_WAIT_MAX, ROOM_WAIT_RECHECK)
+            for rid in [rid for rid, (_v, seen) in _room_versions.items() if seen < cutoff]:
+                del _room_versions[rid]
+
+
+def bump_room_version(conn, room_id):
+    """
+    Count a lobby change (join, start). Call notify_room() with the result after
+    committing so waiters read the committed state.
+    """
+    # UPDATE ... RETURNING needs SQLite 3.35; the SELECT reads the same write transaction.
+    conn.execute("UPDATE roulette_rooms SET version = version + 1 WHERE id = ?", (room_id,))
+    row = conn.execute("SELECT version FROM roulette_rooms WHERE id = ?", (room_id,)).fetchone()
+    return row["version"] if row else None
+
+
+def notify_room(room_id, version):
+    if version is not None:
+        _record_room_version(room_id, version)
+
+
+def room_version(room_id, max_age):
+    """
+    The room's version as this process last saw it, re-read from the database if
+    that is older than max_age seconds. None if the room does not exist.
+    """
+    with _room_changed:
+        state = _room_versions.get(room_id)
+        if state is not None and time.monotonic() - state[1] < max_age:
+            return state[0]
+    row = db().execute("SELECT version FROM roulette_rooms WHERE id = ?", (room_id,)).fetchone()
+    # Hand the pooled connection back rather than holding it through a long wait.
+    release_db()
     if not row:
-        conn.close()
-        return None, None, None
-    rounds = json.loads(row["rounds_json"] or "[]")
-    players = json.loads(row["players_json"] or "[]")
-    return conn, rounds, players
+        return None
+    _record_room_version(room_id, row["version"])
+    return row["version"]
+
+
+def wait_room_change(room_id, since, timeout):
+    """
+    Block until the room's version exceeds `since` or `timeout` seconds pass; returns
+    the version then (None if the room does not exist). Reads the database once up
+    front and otherwise only on ROOM_WAIT_RECHECK, so idle waiters cost no queries.
+    """
+    deadline = time.monotonic() + timeout
+    version = room_version(room_id, max_age=0)
+    recheck = ROOM_WAIT_RECHECK if ROOM_WAIT_RECHECK > 0 else float("inf")
+    while version is not None and version <= since:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        with _room_changed:
+            state = _room_versions.get(room_id)
+            if state is None or state[0] <= since:
+                _room_changed.wait(timeout=min(remaining, recheck))
+        version = room_version(room_id, max_age=recheck)
+    return version
 
 
 def _get_room(room_id):
+    """
+    (conn, room, players) with lobby columns only (player_id, name, item_count);
+    history blobs are read by room start alone (see _room_player_histories).
+    """
     conn = db()
     room = conn.execute(
-        "SELECT id, picks, status, game_id FROM roulette_rooms WHERE id = ?",
+        "SELECT id, picks, status, game_id, version FROM roulette_rooms WHERE id = ?",
         (room_id,),
     ).fetchone()
     if not room:
-        conn.close()
         return None, None, None
     players = conn.execute(
-        "SELECT player_id, name, history_json FROM roulette_room_players WHERE room_id = ? ORDER BY created_at",
+        "SELECT player_id, name, item_count FROM roulette_room_players WHERE room_id = ? ORDER BY created_at",
         (room_id,),
     ).fetchall()
     return conn, room, players
 
 
+def _room_player_histories(conn, room_id):
+    return conn.execute(
+        "SELECT player_id, name, history_json, pool_json FROM roulette_room_players WHERE room_id = ? ORDER BY created_at",
+        (room_id,),
+    ).fetchall()
+
+
 @app.post("/api/review-summary")
 def review_summary():
     data = request.get_json(silent=True) or {}
@@ -316,10 +1330,18 @@ def delete_user():
         return error_response("session_id_required", 400)
 
     conn = db()
+    case_ids = [r["id"] for r in conn.execute("SELECT id FROM cases WHERE session_id = ?", (session_id,))]
+    supersede_case_jobs(conn, case_ids)
+    conn.execute(
+        "DELETE FROM case_rounds WHERE case_id IN (SELECT id FROM cases WHERE session_id = ?)",
+        (session_id,),
+    )
     conn.execute("DELETE FROM cases WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM history_items WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM curator_cache WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM round_pool WHERE session_id = ?", (session_id,))
     conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
     conn.commit()
-    conn.close()
     resp = jsonify({"ok": True})
     try:
         resp.delete_cookie(SESSION_KEY, path="/")
@@ -344,35 +1366,19 @@ def roulette_room_create():
         (room_id, utc_now_iso(), picks, "open"),
     )
     conn.commit()
-    conn.close()
 
     join_url = f"{request.host_url.rstrip('/')}/roulette-room/{room_id}"
     return jsonify({"ok": True, "room_id": room_id, "picks": picks, "join_url": join_url})
 
 
-@app.get("/api/roulette/room/<room_id>")
-def roulette_room_status(room_id):
-    conn, room, players = _get_room(room_id)
-    if not room:
-        return error_response("room_not_found", 404)
-
-    players_out = []
-    for p in players or []:
-        try:
-            hist = json.loads(p["history_json"] or "[]")
-        except Exception:
-            hist = []
-        players_out.append({
-            "id": p["player_id"],
-            "name": p["name"],
-            "count": len(hist),
-        })
-
+def room_status_payload(room, players):
+    players_out = [{"id": p["player_id"], "name": p["name"], "count": p["item_count"]} for p in players or []]
     payload = {
         "ok": True,
         "room_id": room["id"],
         "picks": room["picks"],
         "status": room["status"],
+        "version": room["version"],
         "players": players_out,
         "can_start": len(players_out) >= 2,
     }
@@ -380,38 +1386,84 @@ def roulette_room_status(room_id):
         play_url = f"{request.host_url.rstrip('/')}/roulette/{room['game_id']}"
         payload["game_id"] = room["game_id"]
         payload["play_url"] = play_url
-    conn.close()
-    return jsonify(payload)
+    return payload
 
 
-@app.post("/api/roulette/room/<room_id>/join")
-def roulette_room_join(room_id):
-    data = request.get_json(silent=True) or {}
-    name = (data.get("name") or "Player").strip()
-    history = data.get("history") if isinstance(data, dict) else None
+@app.get("/api/roulette/room/<room_id>")
+def roulette_room_status(room_id):
+    _conn, room, players = _get_room(room_id)
+    if not room:
+        return error_response("room_not_found", 404)
+    return jsonify(room_status_payload(room, players))
+
+
+@app.get("/api/roulette/room/<room_id>/wait")
+def roulette_room_wait(room_id):
+    """
+    Long-poll for lobby changes: returns the room status as soon as its version
+    exceeds since_version, or {changed: false} after `timeout` seconds (at most ROOM_WAIT_MAX).
+    """
+    since = request.args.get("since_version", default=-1, type=int)
+    timeout = request.args.get("timeout", default=ROOM_WAIT_MAX, type=float)
+    timeout = max(0.0, min(timeout, ROOM_WAIT_MAX))
+
+    version = wait_room_change(room_id, since, timeout)
+    if version is None:
+        return error_response("room_not_found", 404)
+    if version <= since:
+        return jsonify({"ok": True, "changed": False, "version": version})
+    _conn, room, players = _get_room(room_id)
+    if not room:
+        return error_response("room_not_found", 404)
+    return jsonify({**room_status_payload(room, players), "changed": True})
 
-    if not history or not isinstance(history, list):
-        return error_response("history_required", 400)
 
+def schedule_player_curation(room_id, player_id, history, picks):
+    """
+    Curate a room player's card pool in a background job and store it with their
+    row, so room start only has to deal cards. Uses the seed make_roulette_rounds
+    would. Runs on the room curation pool, apart from create-case jobs. Returns the
+    job id, or None when ROOM_CURATE_MAX_PENDING are queued (start curates then).
+    """
+    def curate(job_conn, job_id):
+        pool = curate_weird_pool(history, count=picks, seed=f"{room_id}-{player_id}")
+        if _set_job_status(job_conn, job_id, "done"):
+            job_conn.execute(
+                "UPDATE roulette_room_players SET pool_json = ? WHERE room_id = ? AND player_id = ?",
+                (json.dumps(pool), room_id, player_id),
+            )
+        job_conn.commit()
+
+    return submit_job("room_curate", None, curate, slots=_room_curate_slots, executor=room_curate_executor())
+
+
+@app.post("/api/roulette/room/<room_id>/join")
+def roulette_room_join(room_id):
     conn, room, _players = _get_room(room_id)
     if not room:
         return error_response("room_not_found", 404)
     if room["status"] != "open":
-        conn.close()
         return error_response("room_closed", 400)
 
-    cleaned = tag_history_items(history, max_history=4000)
+    data, cleaned, total_in, _bytes_in, _tags_trusted = read_history_upload(max_history=4000)
+    name = data.get("name")
+    name = name.strip() if isinstance(name, str) else "Player"
+
+    if data.get("history") is not True or not total_in:
+        return error_response("history_required", 400)
     if not cleaned:
-        conn.close()
         return error_response("no_usable_history", 400)
 
     player_id = gen_id(6)
     conn.execute(
-        "INSERT INTO roulette_room_players (room_id, player_id, name, history_json, created_at) VALUES (?, ?, ?, ?, ?)",
-        (room_id, player_id, name or "Player", json.dumps(cleaned), utc_now_iso()),
+        "INSERT INTO roulette_room_players (room_id, player_id, name, history_json, created_at, item_count) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (room_id, player_id, name or "Player", json.dumps(cleaned), utc_now_iso(), len(cleaned)),
     )
+    version = bump_room_version(conn, room_id)
     conn.commit()
-    conn.close()
+    notify_room(room_id, version)
+    schedule_player_curation(room_id, player_id, cleaned, room["picks"])
     return jsonify({"ok": True, "player_id": player_id, "name": name or "Player", "count": len(cleaned)})
 
 
@@ -424,25 +1476,25 @@ def roulette_room_start(room_id):
     # If already started, return existing link
     if room["game_id"]:
         play_url = f"{request.host_url.rstrip('/')}/roulette/{room['game_id']}"
-        conn.close()
         return jsonify({"ok": True, "game_id": room['game_id'], "play_url": play_url, "already_started": True})
 
     if room["status"] != "open":
-        conn.close()
         return error_response("room_closed", 400)
 
     if not players or len(players) < 2:
-        conn.close()
         return error_response("need_two_players", 400)
 
     players_payload = []
     players_public = []
-    for p in players:
+    for p in _room_player_histories(conn, room_id):
         try:
             hist = json.loads(p["history_json"] or "[]")
         except Exception:
             hist = []
-        players_payload.append({"id": p["player_id"], "name": p["name"], "history": hist})
+        player = {"id": p["player_id"], "name": p["name"], "history": hist}
+        if p["pool_json"] is not None:
+            player["pool"] = json.loads(p["pool_json"])
+        players_payload.append(player)
         players_public.append({"id": p["player_id"], "name": p["name"]})
 
     game_id = gen_id(10)
@@ -456,8 +1508,9 @@ def roulette_room_start(room_id):
         "UPDATE roulette_rooms SET status = 'started', game_id = ?, started_at = ? WHERE id = ?",
         (game_id, utc_now_iso(), room_id),
     )
+    version = bump_room_version(conn, room_id)
     conn.commit()
-    conn.close()
+    notify_room(room_id, version)
 
     play_url = f"{request.host_url.rstrip('/')}/roulette/{game_id}"
     return jsonify({"ok": True, "game_id": game_id, "play_url": play_url})
@@ -480,7 +1533,7 @@ def roulette_create():
         history = p.get("history")
         if not history or not isinstance(history, list):
             continue
-        cleaned_history = tag_history_items(history, max_history=4000)
+        cleaned_history = tag_history_items(history, max_history=4000, features=True)
         if not cleaned_history:
             continue
         player_id = p.get("id") or gen_id(6)
@@ -504,7 +1557,6 @@ def roulette_create():
         (game_id, utc_now_iso(), json.dumps(rounds), json.dumps(players_public)),
     )
     conn.commit()
-    conn.close()
 
     play_url = f"{request.host_url.rstrip('/')}/roulette/{game_id}"
     return jsonify({
@@ -519,17 +1571,15 @@ def roulette_create():
 
 @app.get("/api/roulette/<game_id>/round/<int:r_idx>")
 def roulette_round(game_id, r_idx):
-    conn, rounds, players = _get_roulette_game(game_id)
+    rounds, players = _get_roulette_game(game_id)
     if rounds is None:
         return error_response("game_not_found", 404)
 
     if r_idx < 0 or r_idx >= len(rounds):
-        conn.close()
         return error_response("round_out_of_range", 404)
 
     r = rounds[r_idx]
     cards = [{"host": c["host"], "title": c["title"]} for c in r.get("cards", [])]
-    conn.close()
     return jsonify({
         "ok": True,
         "round": r_idx,
@@ -545,18 +1595,16 @@ def roulette_guess(game_id):
     r_idx = int(data.get("round") or 0)
     player_id = data.get("player_id")
 
-    conn, rounds, players = _get_roulette_game(game_id)
+    rounds, players = _get_roulette_game(game_id)
     if rounds is None:
         return error_response("game_not_found", 404)
 
     if r_idx < 0 or r_idx >= len(rounds):
-        conn.close()
         return error_response("round_out_of_range", 400)
     r = rounds[r_idx]
     correct_id = r.get("player_id")
     correct_name = r.get("player_name") or correct_id
     is_correct = (player_id == correct_id)
-    conn.close()
     return jsonify({
         "ok": True,
         "correct": is_correct,
@@ -565,34 +1613,109 @@ def roulette_guess(game_id):
     })
 
 
-@app.get("/api/type-map")
-def type_map():
+# ============================================================
+# Type map responses
+# ============================================================
+TYPE_MAP_FORMATS = ("full", "compact")
+# format -> (tagger_version, {content-encoding: body}); rebuilt when the version changes
+_type_map_bodies = {}
+_type_map_bodies_lock = threading.Lock()
+
+
+def type_map_payload(fmt):
     """
-    Expose host->type mapping so clients can classify locally.
+    /api/type-map body. "compact" sends each host's type as an index into
+    type_names instead of repeating the type name for every host.
     """
-    return jsonify({
+    entries = dict(get_type_map().items())
+    if fmt == "compact":
+        type_names = sorted(set(entries.values()))
+        index = {name: i for i, name in enumerate(type_names)}
+        extra = {"format": "compact", "type_names": type_names, "type_map": {h: index[t] for h, t in entries.items()}}
+    else:
+        extra = {"type_map": entries}
+    return {
         "ok": True,
-        "type_map": TYPE_MAP,
+        **extra,
         "type_to_tag": TYPE_TO_TAG,
         "tag_defs": TAG_DEFS,
         "tag_min_count": TAG_MIN_COUNT,
-    })
+        "fallback_tag": FALLBACK_TAG,
+        "tagger_version": tagger_version(),
+    }
+
+
+def type_map_bodies(fmt):
+    """
+    Serialized /api/type-map body for the current tagger_version, precompressed
+    with gzip and, when the optional `brotli` package is installed, br.
+    Returns (tagger_version, {content-encoding: bytes}).
+    """
+    version = tagger_version()
+    cached = _type_map_bodies.get(fmt)
+    if cached is not None and cached[0] == version:
+        return cached
+    with _type_map_bodies_lock:
+        cached = _type_map_bodies.get(fmt)
+        if cached is not None and cached[0] == version:
+            return cached
+        raw = json.dumps(type_map_payload(fmt), separators=(",", ":")).encode("utf-8")
+        bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+        try:
+            import brotli
+        except ImportError:
+            pass
+        else:
+            # Max quality is slow (~1 s) but runs once per type map version, normally in warm_up().
+            bodies["br"] = brotli.compress(raw, quality=11)
+        cached = _type_map_bodies[fmt] = (version, bodies)
+    return cached
+
+
+@app.get("/api/type-map")
+def type_map():
+    """
+    Expose host->type mapping so clients can classify locally.
+    Served from precompressed bodies with a strong ETag per version, format and encoding.
+    """
+    fmt = request.args.get("format") or "full"
+    if fmt not in TYPE_MAP_FORMATS:
+        return error_response("unknown_format", 400)
+    version, bodies = type_map_bodies(fmt)
+    encoding = request.accept_encodings.best_match([e for e in ("br", "gzip") if e in bodies]) or "identity"
+    etag = f"{version}-{fmt}-{encoding}"
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(bodies[encoding], mimetype="application/json")
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = f"public, max-age={TYPE_MAP_MAX_AGE}"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
 
 
 @app.get("/api/session/<session_id>/tags")
 def session_tags(session_id):
     conn = db()
-    row = conn.execute("SELECT history_json FROM sessions WHERE id = ?", (session_id,)).fetchone()
-    conn.close()
-    if not row:
+    if not session_exists(conn, session_id):
         return error_response("session_not_found", 404)
 
-    history = json.loads(row["history_json"] or "[]")
-    tags_summary = summarize_items_by_tag(history)
+    rows = conn.execute(
+        """
+        SELECT tag, host, COUNT(*) AS n FROM history_items
+        WHERE session_id = ?
+        GROUP BY tag, host
+        ORDER BY n DESC, MIN(idx)
+        """,
+        (session_id,),
+    ).fetchall()
+    tags_summary = summarize_tag_host_counts((r["tag"], r["host"], r["n"]) for r in rows)
     return jsonify({
         "ok": True,
         "tags": tags_summary,
-        "total": len(history),
+        "total": sum(r["n"] for r in rows),
         "min_per_tag": TAG_MIN_COUNT,
     })
 
@@ -610,23 +1733,23 @@ def create_case():
     pick_n = max(50, min(pick_n, 400))
 
     conn = db()
-    row = conn.execute("SELECT history_json FROM sessions WHERE id = ?", (session_id,)).fetchone()
-    if not row:
-        conn.close()
+    if not session_exists(conn, session_id):
         return error_response("session_not_found", 404)
 
-    history = json.loads(row["history_json"] or "[]")
-    filtered_history = filter_history_by_tags(history, selected_tags) if selected_tags else history
-    if not filtered_history:
-        filtered_history = history
+    filtered_history = load_generation_history(conn, session_id, selected_tags)
+
+    if data.get("async"):
+        return create_case_async(conn, session_id, filtered_history, rounds_n, selected_tags, pick_n)
 
     try:
         # ✅ NEW: two-stage AI (curator -> rounds)
-        rounds_data = make_rounds_ai_two_stage(
+        rounds_data = make_rounds_ai_cached(
+            conn,
+            session_id,
             filtered_history,
             n_rounds=rounds_n,
             seed=session_id,
-            allowed_tags=selected_tags,
+            selected_tags=selected_tags,
             pick_n=pick_n,
             meta={"session_id": session_id, "request": "create_case"},
         )
@@ -641,11 +1764,12 @@ def create_case():
 
     case_id = gen_id(12)
     conn.execute(
-        "INSERT INTO cases (id, session_id, created_at, rounds_json) VALUES (?, ?, ?, ?)",
-        (case_id, session_id, utc_now_iso(), json.dumps(rounds_data)),
+        "INSERT INTO cases (id, session_id, created_at, rounds_json) VALUES (?, ?, ?, '[]')",
+        (case_id, session_id, utc_now_iso()),
     )
+    insert_case_rounds(conn, case_id, rounds_data)
     conn.commit()
-    conn.close()
+    schedule_pool_refill(conn, session_id, selected_tags, pick_n)
 
     play_url = f"{request.host_url.rstrip('/')}/play/{case_id}"
     return jsonify({
@@ -658,14 +1782,91 @@ def create_case():
     })
 
 
+def create_case_async(conn, session_id, filtered_history, rounds_n, selected_tags, pick_n):
+    """
+    Save the deterministic make_rounds() result as a provisional case right away,
+    then swap in the two-stage AI rounds from a background job.
+    """
+    provisional = make_rounds(
+        filtered_history,
+        n_rounds=rounds_n,
+        seed=session_id,
+        allowed_tags=selected_tags,
+    )
+    case_id = gen_id(12)
+    conn.execute(
+        "INSERT INTO cases (id, session_id, created_at, rounds_json) VALUES (?, ?, ?, '[]')",
+        (case_id, session_id, utc_now_iso()),
+    )
+    insert_case_rounds(conn, case_id, provisional)
+    conn.commit()
+
+    def generate(job_conn, job_id):
+        rounds_data = make_rounds_ai_cached(
+            job_conn,
+            session_id,
+            filtered_history,
+            n_rounds=rounds_n,
+            seed=session_id,
+            selected_tags=selected_tags,
+            pick_n=pick_n,
+            meta={"session_id": session_id, "request": "create_case", "job_id": job_id},
+        )
+        if _set_job_status(job_conn, job_id, "done"):
+            job_conn.execute("DELETE FROM case_rounds WHERE case_id = ?", (case_id,))
+            insert_case_rounds(job_conn, case_id, rounds_data)
+            # The play link is already out; every worker must drop the provisional rounds.
+            bump_case_version(job_conn, case_id)
+        job_conn.commit()
+        # After the curator cache is warm, so the pool only costs stage 2.
+        schedule_pool_refill(job_conn, session_id, selected_tags, pick_n)
+
+    job_id = submit_job("create_case", case_id, generate)
+
+    play_url = f"{request.host_url.rstrip('/')}/play/{case_id}"
+    return jsonify({
+        "ok": True,
+        "play_url": play_url,
+        "case_id": case_id,
+        "rounds": provisional,
+        "selected_tags": selected_tags,
+        "pick_n": pick_n,
+        "provisional": True,
+        "job_id": job_id,
+        "job_status": "pending" if job_id else "queue_full",
+    })
+
+
+@app.get("/api/job/<job_id>")
+def job_status(job_id):
+    conn = db()
+    row = conn.execute(
+        "SELECT id, kind, case_id, status, error FROM jobs WHERE id = ?",
+        (job_id,),
+    ).fetchone()
+    if not row:
+        return error_response("job_not_found", 404)
+
+    payload = {
+        "ok": True,
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "case_id": row["case_id"],
+    }
+    if row["error"]:
+        payload["error_detail"] = row["error"]
+    if row["status"] == "done" and row["case_id"]:
+        payload["rounds"] = load_case_rounds(conn, row["case_id"])
+    return jsonify(payload)
+
 
 @app.get("/api/case/<case_id>/rounds")
 def case_rounds(case_id):
-    conn, case_row, _history = get_case_with_history(case_id)
+    conn, case_row = get_case(case_id)
     if not case_row:
         return error_response("case_not_found", 404)
-    rounds = json.loads(case_row["rounds_json"] or "[]")
-    conn.close()
+    rounds = load_case_rounds(conn, case_id)
     return jsonify({"ok": True, "rounds": rounds, "total": len(rounds)})
 
 
@@ -681,25 +1882,37 @@ def edit_case(case_id):
     pick_n = int(data.get("pick_n") or 300)
     pick_n = max(50, min(pick_n, 400))
 
-    conn, case_row, history = get_case_with_history(case_id)
+    conn, case_row = get_case(case_id)
     if not case_row:
         return error_response("case_not_found", 404)
 
-    rounds = json.loads(case_row["rounds_json"] or "[]")
-    filtered_history = filter_history_by_tags(history, selected_tags) if selected_tags else history
-    if not filtered_history:
-        filtered_history = history
+    total = count_case_rounds(conn, case_id)
+
+    pool_key = round_pool_key(selected_tags, pick_n)
+    pooled = []  # round_pool rows taken by generate(), restored if the edit is refused
 
     def generate(count=1):
+        session_id = case_row["session_id"]
+        pooled.extend(take_pool_rounds(conn, session_id, pool_key, count))
+        rounds = [_row_to_round(r) for r in pooled]
+        if len(rounds) < count:
+            rounds += generate_now(count - len(rounds))
+        schedule_pool_refill(conn, session_id, selected_tags, pick_n)
+        return rounds
+
+    def generate_now(count):
+        filtered_history = load_generation_history(conn, case_row["session_id"], selected_tags)
         # Important: use a fresh seed per regen so it doesn't repeat
         regen_seed = f"{case_id}-{utc_now_iso()}"
         try:
             # ✅ NEW: two-stage AI
-            return make_rounds_ai_two_stage(
+            return make_rounds_ai_cached(
+                conn,
+                case_row["session_id"],
                 filtered_history,
                 n_rounds=count,
                 seed=regen_seed,
-                allowed_tags=selected_tags,
+                selected_tags=selected_tags,
                 pick_n=pick_n,
                 meta={"case_id": case_id, "action": action},
             )
@@ -712,47 +1925,51 @@ def edit_case(case_id):
                 allowed_tags=selected_tags,
             )
 
-    if action == "delete_round":
-        idx = int(target_round) if target_round is not None else -1
-        if idx < 0 or idx >= len(rounds):
-            conn.close()
-            return error_response("round_not_found", 400)
-        rounds.pop(idx)
-
-    elif action == "regenerate_round":
+    # Generate first so no write transaction is held across the LLM calls;
+    # manual edits then win over a still-running create-case job.
+    if action in ("delete_round", "regenerate_round"):
         idx = int(target_round) if target_round is not None else -1
-        if idx < 0 or idx >= len(rounds):
-            conn.close()
+        if idx < 0 or idx >= total:
             return error_response("round_not_found", 400)
-        new_round = generate(1)[0]
-        rounds[idx] = new_round
-
+        target = case_round_cards(conn, case_id, idx)
+        if action == "regenerate_round":
+            new_round = generate(1)[0]
     elif action == "append_round":
         count = max(1, min(int(data.get("count") or 1), 5))
-        rounds.extend(generate(count))
-
+        new_rounds = generate(count)
     else:
-        conn.close()
         return error_response("unknown_action", 400)
 
-    conn.execute(
-        "UPDATE cases SET rounds_json = ? WHERE id = ?",
-        (json.dumps(rounds), case_id),
-    )
+    # supersede_case_jobs() takes the write lock, so what is read below can't change
+    # before the commit; a concurrent edit may have moved the rounds since the reads above.
+    supersede_case_jobs(conn, [case_id])
+    if not conn.execute("SELECT 1 FROM cases WHERE id = ?", (case_id,)).fetchone():
+        conn.rollback()
+        return error_response("case_not_found", 404)
+    if action == "append_round":
+        insert_case_rounds(conn, case_id, new_rounds, start_idx=count_case_rounds(conn, case_id))
+    elif case_round_cards(conn, case_id, idx) != target:
+        conn.rollback()
+        restore_pool_rounds(conn, case_row["session_id"], pool_key, pooled)
+        conn.commit()
+        return error_response("round_not_found", 400)
+    elif action == "delete_round":
+        delete_case_round(conn, case_id, idx)
+    else:
+        replace_case_round(conn, case_id, idx, new_round)
+    bump_case_version(conn, case_id)
+
     conn.commit()
-    conn.close()
+    rounds = load_case_rounds(conn, case_id)
     return jsonify({"ok": True, "rounds": rounds, "total": len(rounds), "pick_n": pick_n})
 
 @app.get("/api/case/<case_id>/round/<int:r_idx>")
 def get_round(case_id, r_idx):
-    conn = db()
-    row = conn.execute("SELECT rounds_json FROM cases WHERE id = ?", (case_id,)).fetchone()
-    conn.close()
+    rounds = get_published_case_rounds(case_id)
 
-    if not row:
+    if rounds is None:
         return error_response("case_not_found", 404)
 
-    rounds = json.loads(row["rounds_json"])
     if r_idx >= len(rounds):
         return error_response("round_out_of_range", 404)
 
@@ -772,15 +1989,12 @@ def guess(case_id):
     r_idx = int(data.get("round") or 0)
     selection = int(data.get("selection") or 0)
 
-    conn = db()
-    row = conn.execute("SELECT rounds_json FROM cases WHERE id = ?", (case_id,)).fetchone()
-    conn.close()
+    rounds = get_published_case_rounds(case_id)
 
-    if not row:
+    if rounds is None:
         return error_response("case_not_found", 404)
 
-    rounds = json.loads(row["rounds_json"])
-    if r_idx >= len(rounds):
+    if r_idx < 0 or r_idx >= len(rounds):
         return error_response("round_out_of_range", 400)
     current_round = rounds[r_idx]
 
@@ -794,6 +2008,25 @@ def guess(case_id):
     })
 
 
+@app.get("/api/cache-stats")
+def cache_stats():
+    """
+    Hit/miss/eviction counters of this process's in-memory caches, for monitoring.
+    """
+    return jsonify({
+        "ok": True,
+        "host_tags": host_tag_cache_stats(),
+        "titles": title_cache_stats(),
+        "play": play_cache.stats(),
+        "curator": curator_cache_stats(db()),
+    })
+
+
+# At the bottom so everything warm_up() touches is defined.
+if os.environ.get("HISTORYCOURT_WARM_UP") == "1":
+    warm_up()
+
+
 if __name__ == "__main__":
     init_db()
     app.run(host="0.0.0.0", port=5000, debug=True)
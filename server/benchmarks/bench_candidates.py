@@ -0,0 +1,109 @@
+"""
+Benchmark for rounds.select_candidates.
+
+Runs select_candidates with the per-item score_item() loop + full sort (numpy
+disabled) and with the batched numpy scoring + argpartition ranking, checks the
+two return the same candidates in the same order, and reports timings at
+several history sizes. "rank" times only scoring and ordering, on the same
+cleaned items; "total" is the whole select_candidates call.
+
+Usage (from server/): python benchmarks/bench_candidates.py [--sizes 500,2000,5000] [--max-candidates 700]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rounds  # noqa: E402
+from rounds import KEEP_HOST_ALLOWLIST, build_host_stats, iter_ranked_items, select_candidates  # noqa: E402
+
+
+def sample_history(n, seed=7):
+    rng = random.Random(seed)
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(here, "fake_result.json"), encoding="utf-8") as f:
+        fake = json.load(f)
+    popular = ["www.google.com", "youtube.com", "reddit.com", "github.com", "docs.google.com"]
+    popular += sorted(KEEP_HOST_ALLOWLIST)[:5]
+    history = []
+    for i in range(n):
+        it = rng.choice(fake)
+        host = rng.choice(popular) if rng.random() < 0.4 else it.get("host") or "example.com"
+        history.append({
+            "host": host,
+            "title": it.get("title") or "",
+            "visitCount": rng.randint(1, 30),
+            "lastVisitTime": 1700000000000 + i,
+        })
+    return history
+
+
+def with_numpy(enabled, fn, *args, **kwargs):
+    saved = rounds._NUMPY
+    rounds._NUMPY = None if enabled else False
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        rounds._NUMPY = saved
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="500,2000,5000")
+    ap.add_argument("--max-candidates", type=int, default=700)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if rounds._numpy() is None:
+        print("numpy is not installed; nothing to compare")
+        sys.exit(1)
+
+    for n in [int(x) for x in args.sizes.split(",")]:
+        history = sample_history(n)
+        kw = {"max_history": n, "max_candidates": args.max_candidates}
+
+        ref = with_numpy(False, select_candidates, history, **kw)
+        new = with_numpy(True, select_candidates, history, **kw)
+        if ref != new:
+            diff = next(i for i, (a, b) in enumerate(zip(ref + [None], new + [None])) if a != b)
+            print(f"MISMATCH at n={n}: {len(ref)} vs {len(new)} candidates, first difference at {diff}")
+            sys.exit(1)
+
+        items = [
+            {"host": rounds.canonical_host(h["host"]), "title": rounds.clean_title_v2(h["title"]), "visitCount": h["visitCount"]}
+            for h in history
+        ]
+        stats = build_host_stats(items)
+
+        def rank(enabled):
+            def run():
+                with_numpy(enabled, lambda: [it for _, it in zip(range(args.max_candidates * 2), iter_ranked_items(items, stats, args.max_candidates * 2))])
+            return run
+
+        rank_ref = best_of(rank(False), args.repeat)
+        rank_new = best_of(rank(True), args.repeat)
+        total_ref = best_of(lambda: with_numpy(False, select_candidates, history, **kw), args.repeat)
+        total_new = best_of(lambda: with_numpy(True, select_candidates, history, **kw), args.repeat)
+        print(
+            f"n={n:>5}  candidates={len(new):>4}  "
+            f"rank: {rank_ref * 1e3:7.2f} -> {rank_new * 1e3:7.2f} ms ({rank_ref / rank_new:.1f}x)  "
+            f"total: {total_ref * 1e3:7.2f} -> {total_new * 1e3:7.2f} ms ({total_ref / total_new:.1f}x)"
+        )
+    print("OK: identical rankings")
+
+
+if __name__ == "__main__":
+    main()
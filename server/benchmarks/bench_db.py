@@ -0,0 +1,136 @@
+"""
+Load benchmark: many threads hammering GET /api/case/<id>/round/<n>.
+
+Starts the app on a threaded local werkzeug server against a throwaway
+SQLite file, seeds one case, then reports throughput, latency percentiles
+and error counts (e.g. 'database is locked' surfacing as 500s). Optional
+writer threads exercise concurrent case edits. --no-play-cache expires
+play_cache entries at once, so every request reads the database.
+
+Usage (from server/):
+  python benchmarks/bench_db.py [--threads 32] [--requests 200] [--writers 2] [--no-play-cache]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+
+def seed_case(app_module, n_rounds=10):
+    rounds = []
+    for i in range(n_rounds):
+        cards = [{"host": f"host{i}-{j}.com", "title": f"title {i}-{j}", "is_lie": j == 2, "tag": "search"} for j in range(3)]
+        rounds.append({"cards": cards, "lie_index": 2, "topic": "search", "tag": "search"})
+    conn = app_module.connect_db()
+    conn.execute(
+        "INSERT INTO sessions (id, created_at, history_json) VALUES (?, ?, ?)",
+        ("benchsession", app_module.utc_now_iso(), "[]"),
+    )
+    conn.execute(
+        "INSERT INTO cases (id, session_id, created_at, rounds_json) VALUES (?, ?, ?, '[]')",
+        ("benchcase", "benchsession", app_module.utc_now_iso()),
+    )
+    app_module.insert_case_rounds(conn, "benchcase", rounds)
+    conn.commit()
+    conn.close()
+    return n_rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="requests per reader thread")
+    parser.add_argument("--writers", type=int, default=2, help="threads writing to the DB meanwhile")
+    parser.add_argument("--no-play-cache", action="store_true", help="read the rounds from SQLite on every request")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="historycourt-bench-")
+    os.environ["HISTORYCOURT_DB"] = os.path.join(tmpdir, "bench.db")
+    if args.no_play_cache:
+        os.environ["HISTORYCOURT_PLAY_CACHE_TTL"] = "0"
+
+    import app as app_module
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app_module.init_db()
+    n_rounds = seed_case(app_module)
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_writers = threading.Event()
+
+    def reader(tid):
+        local_lat, local_err = [], []
+        for i in range(args.requests):
+            url = f"{base}/api/case/benchcase/round/{(tid + i) % n_rounds}"
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url) as resp:
+                    resp.read()
+            except urllib.error.HTTPError as e:
+                local_err.append(e.code)
+            except OSError as e:
+                local_err.append(str(e))
+            local_lat.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_lat)
+            errors.extend(local_err)
+
+    def writer():
+        with app_module.app.app_context():
+            while not stop_writers.is_set():
+                conn = app_module.db()
+                try:
+                    conn.execute(
+                        "UPDATE sessions SET created_at = ? WHERE id = ?",
+                        (app_module.utc_now_iso(), "benchsession"),
+                    )
+                    conn.commit()
+                except Exception as e:
+                    with lock:
+                        errors.append(f"writer: {e}")
+                time.sleep(0.001)
+
+    writers = [threading.Thread(target=writer) for _ in range(args.writers)]
+    for w in writers:
+        w.start()
+
+    readers = [threading.Thread(target=reader, args=(t,)) for t in range(args.threads)]
+    start = time.perf_counter()
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    stop_writers.set()
+    for w in writers:
+        w.join()
+    server.shutdown()
+
+    total = len(latencies)
+    lat_ms = sorted(x * 1000 for x in latencies)
+    print(f"{total} requests from {args.threads} threads ({args.writers} writers) in {elapsed:.2f}s: {total / elapsed:.0f} req/s")
+    print(f"latency p50 {statistics.median(lat_ms):.2f} ms, p95 {lat_ms[int(total * 0.95) - 1]:.2f} ms, max {lat_ms[-1]:.2f} ms")
+    print(f"errors: {len(errors)}" + (f" e.g. {errors[:3]}" if errors else ""))
+    print(f"play cache: {app_module.play_cache.stats()}")
+    print(f"idle pooled connections: {app_module._db_pool.qsize()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Connection-reuse check for rounds.get_openai_client() against a local stub
+chat-completions server.
+
+The stub speaks HTTP/1.1 keep-alive and counts TCP connections. The shared
+client should open one connection for sequential calls (and at most
+OPENAI_MAX_CONNECTIONS under concurrency). A fresh client per call, as the
+code used to build, opens one per call. Exits non-zero if the shared client
+does not reuse connections.
+
+Usage (from server/): python benchmarks/bench_openai_client.py [--calls 20] [--threads 4]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [{
+        "index": 0,
+        "finish_reason": "stop",
+        "message": {"role": "assistant", "content": "{\"picks\": []}"},
+    }],
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle stall keep-alive calls.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps(COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def call(client):
+    client.chat.completions.create(model="stub", messages=[{"role": "user", "content": "hi"}])
+
+
+def measure(label, make_client, calls, threads):
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: call(make_client()), range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {calls} calls on {threads} thread(s) -> {StubHandler.connections} connections, "
+          f"{elapsed / calls * 1000:.2f} ms/call")
+    return StubHandler.connections
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+
+    import openai
+    import rounds
+
+    def fresh_client():
+        return openai.OpenAI(base_url=os.environ["OPENAI_BASE_URL"], api_key="stub")
+
+    measure("fresh client per call", fresh_client, args.calls, 1)
+    shared_seq = measure("shared client", rounds.get_openai_client, args.calls, 1)
+    shared_par = measure("shared client", rounds.get_openai_client, args.calls, args.threads)
+    rounds.reset_openai_client()
+    server.shutdown()
+
+    limit = min(args.threads, rounds.OPENAI_MAX_CONNECTIONS)
+    if shared_seq != 1 or shared_par > limit:
+        print(f"FAIL: expected 1 sequential connection and <= {limit} concurrent ones")
+        sys.exit(1)
+    print("OK: shared client reuses pooled connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark for GET /api/roulette/room/<room_id> (lobby status polling).
+
+Fills rooms with --players-list players holding --items history items each,
+then times the original handler (json.loads of every player's history_json to
+count items) against the current one, which reads the stored item_count and
+never touches history blobs. Both must report the same players and counts.
+
+Usage (from server/): python benchmarks/bench_room_status.py [--players-list 10,50,200] [--items 4000] [--requests 20]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("HISTORYCOURT_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import app as server  # noqa: E402
+from flask import jsonify  # noqa: E402
+from utils import utc_now_iso  # noqa: E402
+
+
+def old_room_status(room_id):
+    conn = server.db()
+    room = conn.execute("SELECT id, picks, status, game_id FROM roulette_rooms WHERE id = ?", (room_id,)).fetchone()
+    players = conn.execute(
+        "SELECT player_id, name, history_json FROM roulette_room_players WHERE room_id = ? ORDER BY created_at",
+        (room_id,),
+    ).fetchall()
+    players_out = []
+    for p in players:
+        hist = json.loads(p["history_json"] or "[]")
+        players_out.append({"id": p["player_id"], "name": p["name"], "count": len(hist)})
+    return jsonify({
+        "ok": True,
+        "room_id": room["id"],
+        "picks": room["picks"],
+        "status": room["status"],
+        "players": players_out,
+        "can_start": len(players_out) >= 2,
+    })
+
+
+def fill_room(conn, room_id, n_players, n_items):
+    history = json.dumps([
+        {"host": f"site{i % 300}.example", "title": f"Some page title number {i}", "tag": "shopping_misc",
+         "lastVisitTime": None, "visitCount": 1 + i % 7}
+        for i in range(n_items)
+    ])
+    conn.execute(
+        "INSERT INTO roulette_rooms (id, created_at, picks, status) VALUES (?, ?, 3, 'open')",
+        (room_id, utc_now_iso()),
+    )
+    conn.executemany(
+        "INSERT INTO roulette_room_players (room_id, player_id, name, history_json, created_at, item_count) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(room_id, f"p{i:04d}", f"Player {i}", history, f"{utc_now_iso()}-{i:04d}", n_items) for i in range(n_players)],
+    )
+    conn.commit()
+
+
+def per_request_ms(client, path, n):
+    client.get(path)
+    start = time.perf_counter()
+    for _ in range(n):
+        resp = client.get(path)
+    return (time.perf_counter() - start) * 1e3 / n, resp.get_json()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--players-list", default="10,50,200")
+    ap.add_argument("--items", type=int, default=4000)
+    ap.add_argument("--requests", type=int, default=20)
+    args = ap.parse_args()
+
+    server.app.add_url_rule("/bench/old-room/<room_id>", "bench_old_room", old_room_status)
+    with server.app.app_context():
+        server.init_db()
+        conn = server.db()
+        sizes = [int(x) for x in args.players_list.split(",")]
+        for n in sizes:
+            fill_room(conn, f"bench{n}", n, args.items)
+    client = server.app.test_client()
+
+    for n in sizes:
+        old_ms, old = per_request_ms(client, f"/bench/old-room/bench{n}", args.requests)
+        new_ms, new = per_request_ms(client, f"/api/roulette/room/bench{n}", args.requests)
+        if old["players"] != new["players"]:
+            print(f"MISMATCH at {n} players")
+            sys.exit(1)
+        print(f"{n:>4} players x {args.items} items: {old_ms:8.2f} -> {new_ms:6.2f} ms/request ({old_ms / new_ms:.0f}x)")
+    print("OK: identical player lists")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark for roulette game creation (make_roulette_rounds) against a local
+stub chat-completions server with a fixed per-call latency.
+
+Times the old one-player-after-another curation (pick_weird_cards per player)
+against make_roulette_rounds with per-player curator calls fanned out in
+parallel (batching disabled), with one batched curator call for all players,
+and with pools already curated when players joined the room (start only deals
+cards), and reports prompt characters sent. With --slow-player one player's curator call
+takes longer than --deadline; that player must fall back to heuristic
+candidates while the others keep theirs.
+
+Usage (from server/): python benchmarks/bench_roulette.py [--players 6] [--latency 0.5] [--deadline 2] [--slow-player]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rounds  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.5
+    slow_latency = 0.0
+    calls = 0
+    prompt_chars = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        with StubHandler.lock:
+            StubHandler.calls += 1
+            StubHandler.prompt_chars += sum(len(m["content"]) for m in req["messages"])
+        user = json.loads(req["messages"][1]["content"])
+        delay = StubHandler.latency
+        if StubHandler.slow_latency and "slow" in (user.get("seed") or ""):
+            delay = StubHandler.slow_latency
+        time.sleep(delay)
+        if "PLAYERS" in user:
+            content = json.dumps({"players": [
+                {"player": p["player"], "picks": [{"idx": i} for i in range(min(user["pick_n"], len(p["ITEMS"])))]}
+                for p in user["PLAYERS"]
+            ]})
+        else:
+            picks = [{"idx": i} for i in range(min(user["pick_n"], len(user["RAW_HISTORY_ITEMS"])))]
+            content = json.dumps({"picks": picks})
+        body = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def sample_players(n, items=400, seed=7):
+    rng = random.Random(seed)
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(here, "fake_result.json"), encoding="utf-8") as f:
+        fake = json.load(f)
+    players = []
+    for p in range(n):
+        history = []
+        for it in rng.sample(fake, min(items, len(fake))):
+            history.append({"host": it.get("host") or "example.com", "title": it.get("title") or "", "visitCount": rng.randint(1, 20)})
+        players.append({"id": f"p{p + 1}", "name": f"Player {p + 1}", "history": history})
+    return players
+
+
+def serial_rounds(players, picks, seed):
+    # What make_roulette_rounds did before curation fanned out.
+    return [rounds.pick_weird_cards(p["history"], count=picks, seed=f"{seed}-{p['id']}") for p in players]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--players", type=int, default=6)
+    ap.add_argument("--picks", type=int, default=3)
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--deadline", type=float, default=2.0)
+    ap.add_argument("--slow-player", action="store_true")
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    StubHandler.latency = args.latency
+
+    players = sample_players(args.players)
+    seed = "bench"
+
+    start = time.perf_counter()
+    serial_rounds(players, args.picks, seed)
+    t_serial = time.perf_counter() - start
+    print(f"serial curation:      {t_serial:6.2f} s  ({StubHandler.calls} curator calls, {StubHandler.prompt_chars / 1e3:.0f}k prompt chars)")
+
+    if args.slow_player:
+        players[0]["id"] = "slow"
+        StubHandler.slow_latency = args.deadline + 2
+    batch_budget = rounds.CURATOR_BATCH_MAX_TOKENS
+    for label, budget in (("parallel per-player", 0), ("batched", batch_budget)):
+        rounds.CURATOR_BATCH_MAX_TOKENS = budget
+        StubHandler.calls = StubHandler.prompt_chars = 0
+        start = time.perf_counter()
+        result = rounds.make_roulette_rounds(players, picks_per_player=args.picks, seed=seed, deadline=args.deadline)
+        t_new = time.perf_counter() - start
+        print(
+            f"{label + ':':<21} {t_new:6.2f} s  ({StubHandler.calls} curator calls, "
+            f"{StubHandler.prompt_chars / 1e3:.0f}k prompt chars, {t_serial / t_new:.1f}x)"
+        )
+        if len(result) != args.players or any(len(r["cards"]) != args.picks for r in result):
+            print("FAIL: wrong number of rounds or cards")
+            sys.exit(1)
+        if t_new > args.deadline + args.latency + 1:
+            print("FAIL: start took longer than the deadline")
+            sys.exit(1)
+
+    # Room flow: each player's pool is curated by a background job at join time.
+    for p in players:
+        p["pool"] = rounds.curate_weird_pool(p["history"], count=args.picks, seed=f"{seed}-{p['id']}")
+    StubHandler.calls = 0
+    start = time.perf_counter()
+    result = rounds.make_roulette_rounds(players, picks_per_player=args.picks, seed=seed, deadline=args.deadline)
+    t_new = time.perf_counter() - start
+    print(f"{'curated at join:':<21} {t_new:6.2f} s  ({StubHandler.calls} curator calls at start, {t_serial / t_new:.0f}x)")
+    if StubHandler.calls:
+        print("FAIL: start called the curator although every player had a pool")
+        sys.exit(1)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Startup benchmark: wall time and peak RSS of `python -c "import <module>"`.
+
+Each run is a fresh interpreter, so the numbers include interpreter startup
+and everything the module imports eagerly. Pass limits to turn it into a
+regression check (non-zero exit when exceeded).
+
+Usage (from server/):
+  python benchmarks/bench_startup.py [--module app] [--runs 10] [--max-ms 400] [--max-rss-mb 80]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Reports the child's own peak RSS (ru_maxrss is KiB on Linux, bytes on macOS).
+CHILD = (
+    "import resource, sys, json\n"
+    "import {module}\n"
+    "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "print(json.dumps({{'rss_kb': rss // 1024 if sys.platform == 'darwin' else rss}}))\n"
+)
+
+
+def run_once(module, env):
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(module=module)],
+        cwd=SERVER_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+    rss_kb = json.loads(out.stdout.strip().splitlines()[-1])["rss_kb"]
+    return wall, rss_kb
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warm-up", action="store_true", help="set HISTORYCOURT_WARM_UP=1")
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.warm_up:
+        env["HISTORYCOURT_WARM_UP"] = "1"
+
+    walls, rss = [], []
+    for _ in range(args.runs):
+        wall, rss_kb = run_once(args.module, env)
+        walls.append(wall * 1000)
+        rss.append(rss_kb / 1024)
+
+    median_ms = statistics.median(walls)
+    peak_mb = max(rss)
+    print(f"import {args.module}: median {median_ms:.1f} ms (min {min(walls):.1f}, max {max(walls):.1f}) over {args.runs} runs")
+    print(f"peak RSS: {peak_mb:.1f} MB")
+
+    failed = False
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"FAIL: median import time {median_ms:.1f} ms > {args.max_ms} ms")
+        failed = True
+    if args.max_rss_mb is not None and peak_mb > args.max_rss_mb:
+        print(f"FAIL: peak RSS {peak_mb:.1f} MB > {args.max_rss_mb} MB")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark for tagging.detect_tag.
+
+Compares the per-item cost of the original substring-scan classifier with the
+precompiled, host-cached classifier in tagging.py, and checks that both return
+the same tag. The sample is skewed towards a few hosts like real histories.
+
+Usage (from server/): python benchmarks/bench_tagging.py [n_items]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tagging  # noqa: E402
+from tagging import TAG_DEFS, TYPE_TO_TAG, canonical_host, detect_tag, read_type_map_csv  # noqa: E402
+
+CSV_TYPE_MAP = read_type_map_csv()
+
+
+def lookup_host_type_reference(h):
+    parts = h.split(".")
+    candidates = [h]
+    if len(parts) >= 3:
+        candidates.append(".".join(parts[-2:]))
+    for cand in candidates:
+        if cand in CSV_TYPE_MAP:
+            return CSV_TYPE_MAP[cand]
+    return None
+
+
+def detect_tag_reference(host, title):
+    h = canonical_host(host)
+    t = (title or "").lower()
+    host_type = lookup_host_type_reference(h) if h else None
+    if host_type:
+        tag = TYPE_TO_TAG.get(host_type)
+        if tag:
+            return tag
+    for tag in TAG_DEFS:
+        if any(p in h for p in tag["hosts"]):
+            return tag["id"]
+        if any(kw in t for kw in tag["keywords"]):
+            return tag["id"]
+    return "shopping_misc"
+
+
+def sample_items(n, seed=7):
+    rng = random.Random(seed)
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(here, "fake_result.json"), encoding="utf-8") as f:
+        titles = [it.get("title") or "" for it in json.load(f)]
+    known = list(CSV_TYPE_MAP.keys())
+    heuristic = [h for t in TAG_DEFS for h in t["hosts"]]
+    popular = ["www.google.com", "youtube.com", "docs.google.com", "reddit.com", "github.com"]
+    hosts = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            hosts.append(rng.choice(popular))
+            continue
+        roll = rng.random()
+        if roll < 0.4:
+            hosts.append(rng.choice(known))
+        elif roll < 0.6:
+            hosts.append("www." + rng.choice(heuristic))
+        elif roll < 0.8:
+            hosts.append(f"sub{rng.randint(0, 99)}.{rng.choice(known)}")
+        else:
+            hosts.append(f"unknown-{rng.randint(0, 9999)}.example")
+    return [(h, rng.choice(titles)) for h in hosts]
+
+
+def time_per_item(fn, items, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for host, title in items:
+            fn(host, title)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    items = sample_items(n)
+
+    mismatches = [(h, t) for h, t in items if detect_tag(h, t) != detect_tag_reference(h, t)]
+    if mismatches:
+        print(f"MISMATCH on {len(mismatches)} items, e.g. {mismatches[:3]}")
+        sys.exit(1)
+
+    before = time_per_item(detect_tag_reference, items)
+    tagging.clear_host_tag_cache()
+    after = time_per_item(detect_tag, items)
+    print(f"items: {n}")
+    print(f"reference: {before * 1e6:.2f} us/item")
+    print(f"compiled:  {after * 1e6:.2f} us/item ({before / after:.1f}x)")
+    print(f"host cache: {tagging.host_tag_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark for titles.analyze_title.
+
+Runs every title in fake_result.json through the original helpers (clean_title_v2
+with inline re.sub calls, is_generic_title looping re.search over
+GENERIC_TITLE_PATTERNS, re.findall for word counts) and through the fused,
+precompiled analyze_title (uncached and cached), and checks all three agree.
+
+Usage (from server/): python benchmarks/bench_titles.py [--repeat 20]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import titles  # noqa: E402
+from titles import GENERIC_TITLE_PATTERNS, analyze_title  # noqa: E402
+
+
+def clean_title_v2_reference(title):
+    if not title:
+        return "Untitled"
+    title = title.strip()
+    title = re.sub(r"\s[-|•]\s.*$", "", title).strip()
+    title = re.sub(r"\s+", " ", title).strip()
+    if len(title) > 90:
+        title = title[:87] + "..."
+    return title or "Untitled"
+
+
+def is_generic_title_reference(title):
+    if not title:
+        return True
+    t = title.strip().lower()
+    if len(t) <= 3:
+        return True
+    for pat in GENERIC_TITLE_PATTERNS:
+        if re.search(pat, t):
+            return True
+    return False
+
+
+def analyze_reference(raw):
+    title = clean_title_v2_reference(raw)
+    return title, is_generic_title_reference(title), len(re.findall(r"[a-zA-Z0-9]{3,}", title.lower()))
+
+
+def load_titles():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(here, "fake_result.json"), encoding="utf-8") as f:
+        return [it.get("title") or "" for it in json.load(f)]
+
+
+def time_per_title(fn, raw_titles, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in raw_titles:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best / len(raw_titles)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    raw_titles = load_titles()
+    mismatches = [t for t in raw_titles if tuple(analyze_title(t)) != analyze_reference(t)]
+    if mismatches:
+        print(f"MISMATCH on {len(mismatches)} titles, e.g. {mismatches[:3]}")
+        sys.exit(1)
+
+    before = time_per_title(analyze_reference, raw_titles, args.repeat)
+    fused = time_per_title(titles._analyze, raw_titles, args.repeat)
+    titles.TITLE_CACHE.clear()
+    cached = time_per_title(analyze_title, raw_titles, args.repeat)
+    print(f"titles: {len(raw_titles)} (fake_result.json)")
+    print(f"reference: {before * 1e6:.2f} us/title")
+    print(f"fused:     {fused * 1e6:.2f} us/title ({before / fused:.1f}x)")
+    print(f"cached:    {cached * 1e6:.2f} us/title ({before / cached:.1f}x)")
+    print(f"title cache: {titles.title_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark for trusted-tag uploads.
+
+Tags --items history entries the way read_history_upload does, once with
+server-side detect_tag() for every item and once keeping client tags (from the
+same detect_tag, as classifyHistory would produce) for all but the
+TRUSTED_TAG_SAMPLE spot check. Runs with cold host-tag/title caches (a user's
+long-tail hosts) and warm ones, and checks both modes keep the same items.
+
+Usage (from server/): python benchmarks/bench_trusted_tags.py [--items 5000] [--sample 0.05]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tagging import HOST_TAG_CACHE, canonical_host, detect_tag, get_type_map, tag_history_item  # noqa: E402
+from titles import TITLE_CACHE  # noqa: E402
+
+
+def build_history(n, seed=7):
+    rng = random.Random(seed)
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(here, "fake_result.json"), encoding="utf-8") as f:
+        fake = json.load(f)
+    hosts = list(get_type_map())
+    history = []
+    for i in range(n):
+        it = rng.choice(fake)
+        host = rng.choice(hosts) if rng.random() < 0.5 else it.get("host") or "example.com"
+        title = f"{it.get('title') or 'Untitled'} #{i % 997}"
+        history.append({"host": host, "title": title, "visitCount": rng.randint(1, 40)})
+    # What the Review page uploads: its own classification attached to each item.
+    for h in history:
+        h["tag"] = detect_tag(canonical_host(h["host"]), h["title"].strip())
+    return history
+
+
+def tag_all(history, _sample):
+    return [tag_history_item(h, features=True) for h in history]
+
+
+def tag_trusted(history, sample):
+    rng = random.Random(1)
+    out = []
+    for h in history:
+        if rng.random() >= sample:
+            out.append(tag_history_item(h, features=True, trusted_tag=h["tag"]))
+        else:
+            out.append(tag_history_item(h, features=True))
+    return out
+
+
+def timed(fn, history, sample, cold):
+    if cold:
+        HOST_TAG_CACHE.clear()
+        TITLE_CACHE.clear()
+    start = time.perf_counter()
+    out = fn(history, sample)
+    return out, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=5000)
+    ap.add_argument("--sample", type=float, default=0.05)
+    args = ap.parse_args()
+
+    history = build_history(args.items)
+    for label, cold in (("cold caches", True), ("warm caches", False)):
+        ref, t_ref = timed(tag_all, history, args.sample, cold)
+        new, t_new = timed(tag_trusted, history, args.sample, cold)
+        if ref != new:
+            print("MISMATCH between server-tagged and trusted items")
+            sys.exit(1)
+        print(f"{label}: re-tag all {t_ref * 1e3:7.1f} ms  trusted {t_new * 1e3:7.1f} ms  ({t_ref / t_new:.1f}x)")
+    print("OK: identical items")
+
+
+if __name__ == "__main__":
+    main()
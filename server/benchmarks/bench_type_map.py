@@ -0,0 +1,83 @@
+"""
+Benchmark for GET /api/type-map.
+
+Compares the original per-request jsonify of the full type map with the
+precomputed responses: body size per format (full / compact) and encoding
+(identity / gzip / br when `brotli` is installed), server time for a fresh
+200 and for a 304 revalidation, and the one-off cost of building the bodies.
+Also checks the compact form expands to the same host->type map.
+
+Usage (from server/): python benchmarks/bench_type_map.py [--requests 50]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("HISTORYCOURT_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import app as server  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+
+def per_request_ms(client, n, path, headers=None):
+    start = time.perf_counter()
+    for _ in range(n):
+        resp = client.get(path, headers=headers or {})
+    return (time.perf_counter() - start) * 1e3 / n, resp
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=50)
+    args = ap.parse_args()
+
+    server.get_type_map()
+    with server.app.app_context():
+        server.init_db()
+    client = server.app.test_client()
+
+    @server.app.get("/bench/type-map-jsonify")
+    def old_type_map():
+        return jsonify({
+            "ok": True,
+            "type_map": dict(server.get_type_map().items()),
+            "type_to_tag": server.TYPE_TO_TAG,
+            "tag_defs": server.TAG_DEFS,
+            "tag_min_count": server.TAG_MIN_COUNT,
+        })
+
+    start = time.perf_counter()
+    for fmt in server.TYPE_MAP_FORMATS:
+        server.type_map_bodies(fmt)
+    print(f"build bodies (once per type map version): {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    full = json.loads(server.type_map_bodies("full")[1]["identity"])
+    compact = json.loads(gzip.decompress(server.type_map_bodies("compact")[1]["gzip"]))
+    if {h: compact["type_names"][i] for h, i in compact["type_map"].items()} != full["type_map"]:
+        print("MISMATCH: compact type map does not expand to the full one")
+        sys.exit(1)
+
+    for fmt in server.TYPE_MAP_FORMATS:
+        sizes = "  ".join(f"{enc} {len(body) / 1e3:7.1f} kB" for enc, body in server.type_map_bodies(fmt)[1].items())
+        print(f"{fmt:>8}: {sizes}")
+
+    old_ms, resp = per_request_ms(client, args.requests, "/bench/type-map-jsonify")
+    print(f"old jsonify 200:        {old_ms:7.2f} ms/request  {len(resp.data) / 1e3:7.1f} kB")
+    enc = "br, gzip"
+    new_ms, resp = per_request_ms(client, args.requests, "/api/type-map?format=compact", {"Accept-Encoding": enc})
+    print(f"compact 200 ({resp.headers.get('Content-Encoding')}):     {new_ms:7.2f} ms/request  {len(resp.data) / 1e3:7.1f} kB")
+    etag = resp.headers["ETag"]
+    nm_ms, resp = per_request_ms(client, args.requests, "/api/type-map?format=compact", {"Accept-Encoding": enc, "If-None-Match": etag})
+    if resp.status_code != 304:
+        print(f"expected 304 on revalidation, got {resp.status_code}")
+        sys.exit(1)
+    print(f"revalidation 304:       {nm_ms:7.2f} ms/request  {len(resp.data) / 1e3:7.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
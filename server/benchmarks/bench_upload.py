@@ -0,0 +1,89 @@
+"""
+Benchmark for the streaming /api/upload-history ingest.
+
+Builds an upload body with --items history entries (like the extension sends
+before the server truncates to 5000) and compares json.loads + tag_history_items
+on the whole list against ingest.read_object_streaming + tag_history_item per
+decoded item (the items past --max-history are only scanned): wall time and
+tracemalloc peak memory (traced separately). Both must keep the same items.
+
+Usage (from server/): python benchmarks/bench_upload.py [--items 50000] [--max-history 5000]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import JSONStreamReader, read_object_streaming  # noqa: E402
+from tagging import tag_history_item, tag_history_items  # noqa: E402
+
+
+def build_body(n, seed=7):
+    rng = random.Random(seed)
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(here, "fake_result.json"), encoding="utf-8") as f:
+        fake = json.load(f)
+    history = []
+    for i in range(n):
+        it = rng.choice(fake)
+        history.append({"host": it.get("host") or "example.com", "title": it.get("title") or "", "visitCount": rng.randint(1, 40)})
+    return json.dumps({"history": history, "session_id": "bench-session"}).encode("utf-8")
+
+
+def load_all(body, max_history):
+    data = json.loads(body)
+    return tag_history_items(data["history"], max_history=max_history, features=True)
+
+
+def load_streaming(body, max_history):
+    items = []
+
+    def keep(h):
+        item = tag_history_item(h, features=True)
+        if item is not None:
+            items.append(item)
+
+    read_object_streaming(JSONStreamReader(io.BytesIO(body)), "history", keep, max_items=max_history)
+    return items
+
+
+def measure(fn, body, max_history):
+    # Timed without tracemalloc, which would dominate; peak memory from a second, traced run.
+    start = time.perf_counter()
+    out = fn(body, max_history)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(body, max_history)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=50000)
+    ap.add_argument("--max-history", type=int, default=5000)
+    args = ap.parse_args()
+
+    body = build_body(args.items)
+    load_all(body, args.max_history)  # warm tag/title caches for both runs
+
+    ref, t_ref, m_ref = measure(load_all, body, args.max_history)
+    new, t_new, m_new = measure(load_streaming, body, args.max_history)
+    if ref != new:
+        print("MISMATCH between full-parse and streaming results")
+        sys.exit(1)
+
+    print(f"body: {len(body) / 1e6:.1f} MB, {args.items} items, kept {len(new)}")
+    print(f"json.loads + slice: {t_ref * 1e3:8.1f} ms  peak {m_ref / 1e6:7.1f} MB")
+    print(f"streaming:          {t_new * 1e3:8.1f} ms  peak {m_new / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
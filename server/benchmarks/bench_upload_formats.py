@@ -0,0 +1,108 @@
+"""
+Upload format benchmark: JSON array (what the extension used to send) vs. the
+extension's capped, gzipped NDJSON.
+
+Builds a heavy user's deduped history, then POSTs it to /api/upload-history
+on a local werkzeug server in each format through a throttled uplink, and
+reports payload size and end-to-end time (client encoding + transfer + server).
+Titles come from fake_result.json, which repeats a lot, so gzip ratios here are
+higher than on real histories; the plain capped NDJSON row isolates the cap.
+
+Usage (from server/):
+  python benchmarks/bench_upload_formats.py [--items 20000] [--uplink-mbps 10] [--cap 5000]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+
+def build_history(n, seed=7):
+    rng = random.Random(seed)
+    with open(os.path.join(SERVER_DIR, "fake_result.json"), encoding="utf-8") as f:
+        fake = json.load(f)
+    out = []
+    for i in range(n):
+        it = rng.choice(fake)
+        out.append({"host": f"www.{it.get('host') or 'example.com'}", "title": f"{it.get('title') or ''} #{i}", "visitCount": rng.randint(1, 40)})
+    return out
+
+
+def encode_json(history, _cap):
+    body = json.dumps({"history": history}).encode("utf-8")
+    return body, {"Content-Type": "application/json"}
+
+
+def encode_ndjson(history, cap):
+    body = "".join(json.dumps(it) + "\n" for it in history[:cap]).encode("utf-8")
+    return body, {"Content-Type": "application/x-ndjson"}
+
+
+def encode_ndjson_gzip(history, cap):
+    body, _ = encode_ndjson(history, cap)
+    return gzip.compress(body, compresslevel=6), {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+
+
+def throttled(body, mbps, chunk=16 * 1024):
+    """Yield the body in chunks paced to `mbps` megabits per second."""
+    per_chunk = chunk * 8 / (mbps * 1e6)
+    start = time.perf_counter()
+    for i in range(0, len(body), chunk):
+        yield body[i:i + chunk]
+        lag = start + per_chunk * (i // chunk + 1) - time.perf_counter()
+        if lag > 0:
+            time.sleep(lag)
+
+
+def upload(base, history, encode, cap, mbps):
+    start = time.perf_counter()
+    body, headers = encode(history, cap)
+    headers = {**headers, "Content-Length": str(len(body))}
+    req = urllib.request.Request(f"{base}/api/upload-history", data=throttled(body, mbps), headers=headers, method="POST")
+    with urllib.request.urlopen(req) as resp:
+        result = json.loads(resp.read())
+    return len(body), time.perf_counter() - start, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=20000)
+    ap.add_argument("--uplink-mbps", type=float, default=10.0)
+    ap.add_argument("--cap", type=int, default=5000, help="items the extension sends (server keeps 5000)")
+    args = ap.parse_args()
+
+    os.environ["HISTORYCOURT_DB"] = os.path.join(tempfile.mkdtemp(prefix="historycourt-bench-"), "bench.db")
+    import app as app_module
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app_module.init_db()
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    history = build_history(args.items)
+    print(f"history: {args.items} items, uplink {args.uplink_mbps:g} Mbit/s")
+    saved = {}
+    for name, encode in (("json array", encode_json), ("ndjson", encode_ndjson), ("ndjson+gzip", encode_ndjson_gzip)):
+        size, elapsed, result = upload(base, history, encode, args.cap, args.uplink_mbps)
+        saved[name] = result["total_saved"]
+        print(f"{name:12s} {size / 1e6:7.2f} MB  {elapsed * 1e3:8.0f} ms  saved {result['total_saved']}")
+    server.shutdown()
+    if len(set(saved.values())) != 1:
+        print("MISMATCH: formats saved different item counts")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
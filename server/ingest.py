@@ -0,0 +1,309 @@
+# ingest.py
+#
+# Incremental JSON reading for large request bodies (history uploads).
+# JSONStreamReader decodes one value at a time from a byte stream, so a
+# {"history": [...], ...} body or an NDJSON body is handled item by item
+# instead of being materialized as one big list first. Past a caller's item cap
+# the rest is only scanned and counted, not decoded. decoded_stream() undoes
+# gzip / zstd Content-Encoding on the fly.
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import json
+import re
+from typing import Any, Callable, Dict, Iterator, Optional
+
+_WS = re.compile(r"[ \t\n\r]*")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+# For skipping values: the next structural character, and the rest of a string after its opening quote.
+_STRUCTURAL = re.compile(r'["\[\]{},]')
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_NONBLANK_LINE = re.compile(r"^[ \t\r]*\S", re.M)
+# Every byte but JSON's structural ones, deleted by _skip_flat_objects().
+_NON_STRUCTURAL = bytes(b for b in range(256) if b not in b'"[]{},')
+_QUOTED = re.compile(rb'"[^"]*"')
+
+
+class UnsupportedEncoding(ValueError):
+    pass
+
+
+def decoded_stream(stream, content_encoding: Optional[str]):
+    """
+    Wrap a request body stream so reads return decompressed bytes.
+    Supports identity, gzip and (with the optional `zstandard` package) zstd.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return stream
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if encoding == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedEncoding("zstd needs the zstandard package") from None
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    raise UnsupportedEncoding(f"unsupported Content-Encoding: {encoding}")
+
+
+class JSONStreamReader:
+    """
+    Pull parser over a binary stream. Buffers at most one undecoded value
+    (capped at max_value_chars) plus one read chunk.
+    """
+
+    def __init__(
+        self,
+        stream,
+        chunk_size: int = 64 * 1024,
+        max_bytes: Optional[int] = None,
+        max_value_chars: int = 1024 * 1024,
+    ):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.max_value_chars = max_value_chars
+        self.bytes_read = 0
+        self.items_skipped = 0  # elements / lines passed over by skip_array_rest() / skip_lines()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False at end of stream."""
+        if self._eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        if not chunk:
+            self._eof = True
+            self._buf += self._decoder.decode(b"", final=True)
+            return False
+        self.bytes_read += len(chunk)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise ValueError("body too large")
+        self._buf += self._decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end)."""
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at byte ~{self.bytes_read}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                ws_end = _WS.match(self._buf, self._pos).end()
+                if ws_end != self._pos:
+                    self._pos = ws_end
+                    continue
+                if len(self._buf) - self._pos > self.max_value_chars:
+                    raise ValueError("JSON value too large")
+                if self._fill():
+                    continue
+                raise ValueError("truncated or invalid JSON")
+            # A number cut by the chunk boundary ("12" of "12.5e3") decodes as a shorter
+            # number; read on until something that can't continue it follows.
+            if isinstance(obj, (int, float)) and not isinstance(obj, bool):
+                if (end == len(self._buf) or self._buf[end] in _NUMBER_CHARS) and self._fill():
+                    continue
+            self._pos = end
+            return obj
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            # Fast path: separator and the start of the next value are already buffered.
+            m = _SEPARATOR.match(self._buf, self._pos)
+            if m and m.end() < len(self._buf):
+                self._pos = m.end()
+                if m.group(1) == "]":
+                    return
+                continue
+            ch = self.peek()
+            self._pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"expected ',' or ']' at byte ~{self.bytes_read}")
+
+    def skip_array_rest(self) -> None:
+        """
+        Consume the rest of the array iter_array() was stopped in, right after an
+        element, counting its remaining elements without decoding them (or checking
+        anything beyond bracket nesting and string quoting).
+        """
+        depth = 1
+        fast = True
+        while True:
+            if depth == 1 and fast:
+                # Retried once per read chunk; what the fast path can't take is walked below.
+                fast = self._skip_flat_objects()
+            m = _STRUCTURAL.search(self._buf, self._pos)
+            if m is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise ValueError("truncated or invalid JSON")
+                fast = True
+                continue
+            ch = m.group()
+            if ch == '"':
+                end = _STRING_REST.match(self._buf, m.end())
+                if end is None:
+                    self._pos = m.start()
+                    if len(self._buf) - self._pos > self.max_value_chars:
+                        raise ValueError("JSON value too large")
+                    if not self._fill():
+                        raise ValueError("truncated or invalid JSON")
+                    fast = True
+                    continue
+                self._pos = end.end()
+                continue
+            self._pos = m.end()
+            if ch == ",":
+                if depth == 1:
+                    self.items_skipped += 1
+            elif ch in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if not depth:
+                    return
+
+    def _skip_flat_objects(self) -> bool:
+        """
+        Fast path of skip_array_rest(): pass over the buffered ", {...}" elements up to
+        the last "}" if they are all objects without nested containers (history items),
+        using whole-buffer bytes operations instead of a loop per token. Returns False,
+        consuming nothing, when the buffer doesn't have that shape.
+        """
+        cut = self._buf.rfind("}", self._pos) + 1
+        if cut <= self._pos:
+            return False
+        seg = self._buf[self._pos:cut].encode("utf-8")
+        # Drop escapes, then everything but structure, then the strings: the ones left
+        # empty in one C pass, the few holding commas or brackets with a regex.
+        seg = seg.replace(b"\\\\", b"").replace(b'\\"', b"")
+        seg = seg.translate(None, _NON_STRUCTURAL).replace(b'""', b"")
+        if b'"' in seg:
+            seg = _QUOTED.sub(b"", seg)
+        n = seg.count(b",{")
+        # With no quotes or brackets left, these counts only fit ",{...},{...}...,{...}".
+        if (
+            not seg.startswith(b",{")
+            or b'"' in seg
+            or b"[" in seg
+            or b"]" in seg
+            or seg.count(b"{") != n
+            or seg.count(b"}") != n
+            or seg.count(b"},{") != n - 1
+        ):
+            return False
+        self.items_skipped += n
+        self._pos = cut
+        return True
+
+    def skip_lines(self) -> None:
+        """Consume the rest of the stream, counting its non-blank lines without decoding them."""
+        while True:
+            last_nl = self._buf.rfind("\n", self._pos)
+            if last_nl >= 0:
+                self.items_skipped += len(_NONBLANK_LINE.findall(self._buf, self._pos, last_nl + 1))
+                self._pos = last_nl + 1
+            if not self._fill():
+                self.items_skipped += len(_NONBLANK_LINE.findall(self._buf, self._pos))
+                self._pos = len(self._buf)
+                return
+
+    def at_end(self) -> bool:
+        return self.peek() == ""
+
+
+def read_object_streaming(
+    reader: JSONStreamReader,
+    array_key: str,
+    on_item: Callable[[Any], None],
+    fields: Optional[Dict[str, Any]] = None,
+    max_items: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Read a top-level JSON object, calling on_item() for each element of its
+    `array_key` array as it is decoded. Returns the other fields; `array_key`
+    maps to True if it was an array (its elements are not kept). Fields are
+    stored into `fields` as they are read, so on_item() can see the ones that
+    precede the array. Elements past the first max_items are skipped and
+    counted in reader.items_skipped. Raises ValueError on malformed input.
+    """
+    if fields is None:
+        fields = {}
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError("object key must be a string")
+            reader.expect(":")
+            if key == array_key and reader.peek() == "[":
+                _read_items(reader.iter_array(), on_item, max_items, reader.skip_array_rest)
+                fields[key] = True
+            else:
+                fields[key] = reader.value()
+            if reader.peek() == ",":
+                reader.expect(",")
+                continue
+            reader.expect("}")
+            break
+    if not reader.at_end():
+        raise ValueError("trailing data after JSON object")
+    return fields
+
+
+def read_ndjson_streaming(
+    reader: JSONStreamReader,
+    on_item: Callable[[Any], None],
+    max_items: Optional[int] = None,
+) -> None:
+    """
+    Call on_item() for each newline-delimited JSON value until the stream ends.
+    Lines past the first max_items are skipped and counted in reader.items_skipped.
+    Raises ValueError on malformed input.
+    """
+    def values():
+        while not reader.at_end():
+            yield reader.value()
+
+    _read_items(values(), on_item, max_items, reader.skip_lines)
+
+
+def _read_items(values: Iterator[Any], on_item: Callable[[Any], None], max_items: Optional[int], skip_rest) -> None:
+    """on_item() for up to max_items values, then skip_rest() if values remain."""
+    for n, item in enumerate(values, 1):
+        on_item(item)
+        if max_items is not None and n >= max_items:
+            values.close()
+            skip_rest()
+            return
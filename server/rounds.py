@@ -15,62 +15,126 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
+import os
 import random
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from os import getenv
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from openai import OpenAI
-
 from tagging import TAG_DEFS, TAG_LOOKUP, detect_tag, canonical_host
+from titles import GENERIC_TITLE_PATTERNS, TitleInfo, analyze_title, clean_title, clean_title_v2, is_generic_title  # noqa: F401
 from utils import utc_now_iso
 
+logger = logging.getLogger(__name__)
+
 
 # -----------------------------
 # AI Generation data (fallback lie ideas)
 # -----------------------------
-FAKE_TITLES: List[Tuple[str, str]] = []
-try:
-    with open("server/fake_results.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-        for item in data:
-            host = canonical_host(item.get("host") or "")
-            title = item.get("title") or ""
-            if host and title:
-                FAKE_TITLES.append((host, title))
-except Exception:
-    # log it out
-    print("Could not load fake_results.json for lie titles fallback.")
-    FAKE_TITLES: List[Tuple[str, str]] = [
-        ("how to get away with murder", "wikihow.com"),
-        ("is it illegal to keep a squirrel", "reddit.com"),
-        ("download more ram free", "softonic.com"),
-        ("why do my feet smell like cheese", "webmd.com"),
-        ("nickelback fan club", "geocities.com"),
-        ("flat earth society membership", "flatearth.org"),
-        ("how to bribe a judge", "legalzoom.com"),
-        ("am I a robot test", "captcha.net"),
-        ("DIY surgery kits", "amazon.com"),
-        ("hot singles in your area", "dating.com"),
-        ("how to delete browser history permanently", "google.com"),
-        ("pretend to work screen", "github.com"),
-    ]
-
-GENERIC_TITLE_PATTERNS: List[str] = [
-    r"^new tab$",
-    r"^home$",
-    r"^homepage$",
-    r"sign in",
-    r"log in",
-    r"login",
-    r"account",
-    r"verify",
-    r"security",
-    r"welcome",
-    r"index of",
+# (title, host) pairs. Loaded lazily by get_fake_titles() so importing this module does no file I/O.
+FAKE_TITLES_PATH = getenv("FAKE_TITLES_PATH", os.path.join(os.path.dirname(__file__), "fake_result.json"))
+DEFAULT_FAKE_TITLES: List[Tuple[str, str]] = [
+    ("how to get away with murder", "wikihow.com"),
+    ("is it illegal to keep a squirrel", "reddit.com"),
+    ("download more ram free", "softonic.com"),
+    ("why do my feet smell like cheese", "webmd.com"),
+    ("nickelback fan club", "geocities.com"),
+    ("flat earth society membership", "flatearth.org"),
+    ("how to bribe a judge", "legalzoom.com"),
+    ("am I a robot test", "captcha.net"),
+    ("DIY surgery kits", "amazon.com"),
+    ("hot singles in your area", "dating.com"),
+    ("how to delete browser history permanently", "google.com"),
+    ("pretend to work screen", "github.com"),
 ]
+_FAKE_TITLES: Optional[List[Tuple[str, str]]] = None
+_FAKE_TITLES_LOCK = threading.Lock()
+
+
+def load_fake_titles(path: str = FAKE_TITLES_PATH) -> List[Tuple[str, str]]:
+    titles: List[Tuple[str, str]] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            for item in data:
+                host = canonical_host(item.get("host") or "")
+                title = item.get("title") or ""
+                if host and title:
+                    titles.append((title, host))
+    except Exception as e:
+        logger.warning("Could not load %s for lie titles fallback: %s", path, e)
+    return titles or list(DEFAULT_FAKE_TITLES)
+
+
+def get_fake_titles() -> List[Tuple[str, str]]:
+    global _FAKE_TITLES
+    if _FAKE_TITLES is None:
+        with _FAKE_TITLES_LOCK:
+            if _FAKE_TITLES is None:
+                _FAKE_TITLES = load_fake_titles()
+    return _FAKE_TITLES
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `rounds.FAKE_TITLES` working for callers that predate get_fake_titles().
+    if name == "FAKE_TITLES":
+        return get_fake_titles()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# One client per process, shared by every thread: its connection pool keeps
+# TLS sessions to the provider alive across curator/round calls.
+OPENAI_TIMEOUT = float(getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_MAX_CONNECTIONS = int(getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+
+_openai_client: Any = None
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    Lazily build the shared client. The openai SDK is imported here, on first
+    LLM call, rather than at module import.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _openai_client_lock:
+            if _openai_client is None:
+                import openai
+
+                # Same Limits class the SDK's HTTP backend uses, whichever that is.
+                limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+                )
+                timeout = openai.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+                _openai_client = openai.OpenAI(
+                    base_url=getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
+                    api_key=getenv("OPENROUTER_API_KEY") or getenv("OPENAI_API_KEY"),
+                    timeout=timeout,
+                    http_client=openai.DefaultHttpxClient(limits=limits, timeout=timeout),
+                )
+    return _openai_client
+
+
+def reset_openai_client() -> None:
+    """Drop the shared client (e.g. after rotating keys); the next call builds a new one."""
+    global _openai_client
+    with _openai_client_lock:
+        client, _openai_client = _openai_client, None
+    if client is not None:
+        client.close()
+
 
 KEEP_HOST_ALLOWLIST = {
     "google.com",
@@ -87,44 +151,22 @@ KEEP_HOST_ALLOWLIST = {
 
 
 # -----------------------------
-# Helpers: titles / scoring
+# Helpers: scoring (title cleaning lives in titles.py)
 # -----------------------------
-def is_generic_title(title: str) -> bool:
-    if not title:
-        return True
-    t = title.strip().lower()
-    if len(t) <= 3:
-        return True
-    for pat in GENERIC_TITLE_PATTERNS:
-        if re.search(pat, t):
-            return True
-    return False
-
-
-def clean_title_v2(title: str) -> str:
-    """Stronger cleaner used for candidate selection + canonicalization."""
-    if not title:
-        return "Untitled"
-    title = title.strip()
-
-    # Remove trailing site decorations like " - YouTube" or " • Something"
-    title = re.sub(r"\s[-|\u2022]\s.*$", "", title).strip()
-
-    # Collapse whitespace
-    title = re.sub(r"\s+", " ", title).strip()
-
-    if len(title) > 90:
-        title = title[:87] + "..."
-    return title or "Untitled"
-
-
-def clean_title(title: str) -> str:
-    """Legacy short cleaner used by the fallback generator."""
-    if not title:
-        return "Untitled Page"
-    title = re.sub(r"\s-.*", "", title).strip()
-    title = re.sub(r"\s+", " ", title).strip()
-    return title[:65] + "..." if len(title) > 65 else (title or "Untitled Page")
+def history_item_features(h: Dict[str, Any], with_tag: bool = True) -> Tuple[str, TitleInfo, Optional[str]]:
+    """
+    (canonical host, TitleInfo, tag of the cleaned title) for one history item.
+    Uses the features stored with the item (tagging.item_features) when present,
+    otherwise derives them; the tag is only derived when with_tag is set.
+    """
+    if "cleanTitle" in h:
+        try:
+            return h["host"], TitleInfo(str(h["cleanTitle"]), bool(h["generic"]), int(h["words"])), h["cleanTag"]
+        except (KeyError, TypeError, ValueError):
+            pass
+    host = canonical_host(h.get("host"))
+    info = analyze_title(h.get("title") or "")
+    return host, info, (detect_tag(host, info.title) if with_tag else None)
 
 
 def build_host_stats(items: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
@@ -153,15 +195,15 @@ def score_item(it: Dict[str, Any], host_stats: Dict[str, Dict[str, Any]]) -> flo
     if not host or not title:
         return -999.0
 
-    if is_generic_title(title):
+    info = analyze_title(title)
+    if info.generic:
         return -50.0
 
     hs = host_stats.get(host, {"n": 1, "variety": 1.0})
     freq = float(hs.get("n", 1))
     variety = float(hs.get("variety", 1.0))
 
-    words = re.findall(r"[a-zA-Z0-9]{3,}", title.lower())
-    specificity = min(len(words), 12)
+    specificity = min(info.words, 12)
 
     score = 0.0
     score += specificity * 2.0
@@ -176,6 +218,105 @@ def score_item(it: Dict[str, Any], host_stats: Dict[str, Dict[str, Any]]) -> flo
     return float(score)
 
 
+_NUMPY: Any = None
+
+
+def _numpy() -> Any:
+    """numpy if installed (imported on first use), else None."""
+    global _NUMPY
+    if _NUMPY is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _NUMPY = numpy
+    return _NUMPY or None
+
+
+def score_items(items: Sequence[Dict[str, Any]], host_stats: Dict[str, Dict[str, Any]]) -> Any:
+    """
+    score_item() for a whole batch as one float64 array. Per-item work is limited to
+    the title checks; the weighting runs as a few vector ops in score_item's order
+    of operations, so scores are bit-identical. Requires numpy.
+    """
+    np = _numpy()
+    host_ids: Dict[str, int] = {}
+    # Titles repeat a lot within one history; check each distinct title once.
+    title_spec: Dict[str, float] = {}
+    hid: List[int] = []
+    spec: List[float] = []
+    visits: List[int] = []
+    for it in items:
+        host = it.get("host")
+        title = it.get("title") or ""
+        hid.append(host_ids.setdefault(host, len(host_ids)))
+        visits.append(min(int(it.get("visitCount") or 1), 20))
+        sp = title_spec.get(title)
+        if sp is None:
+            info = analyze_title(title)
+            sp = -1.0 if not title or info.generic else float(min(info.words, 12))
+            title_spec[title] = sp
+        spec.append(sp if host else -1.0)
+
+    hid_arr = np.array(hid, dtype=np.intp)
+    spec_arr = np.array(spec, dtype=np.float64)
+    valid = spec_arr >= 0.0
+    hosts = list(host_ids)
+    default = {"n": 1, "variety": 1.0}
+    freq = np.array([float(host_stats.get(h, default).get("n", 1)) for h in hosts])[hid_arr]
+    variety = np.array([float(host_stats.get(h, default).get("variety", 1.0)) for h in hosts])[hid_arr]
+    allow = np.array([h in KEEP_HOST_ALLOWLIST for h in hosts], dtype=bool)[hid_arr]
+
+    scores = spec_arr * 2.0
+    scores += np.array(visits, dtype=np.float64) * 0.2
+    scores += np.where(allow, variety * 2.0, variety * 6.0)
+    scores -= np.where(allow, 0.0, np.minimum(freq, 500.0) * 0.02)
+    return np.where(valid, scores, -50.0)
+
+
+def iter_ranked_items(
+    items: Sequence[Dict[str, Any]],
+    host_stats: Dict[str, Dict[str, Any]],
+    first_k: int = 1400,
+) -> Iterable[Dict[str, Any]]:
+    """
+    Items with a positive score, best first; ties keep input order (same as a stable
+    descending sort). With numpy, only the top first_k are ordered up front via
+    argpartition; later blocks are ordered only if the caller keeps consuming.
+    Hosts that select_candidates would skip for low variety are dropped up front.
+    """
+    np = _numpy()
+    if np is None:
+        scored = [(score_item(it, host_stats), it) for it in items]
+        scored = [x for x in scored if x[0] > 0]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        for _, it in scored:
+            yield it
+        return
+
+    scores = score_items(items, host_stats)
+    low_variety = {
+        h for h, hs in host_stats.items() if h not in KEEP_HOST_ALLOWLIST and float(hs.get("variety", 0.0)) < 0.15
+    }
+    if low_variety:
+        scores = np.where(np.array([it["host"] in low_variety for it in items], dtype=bool), 0.0, scores)
+    remaining = np.flatnonzero(scores > 0)
+    k = max(1, first_k)
+    while remaining.size:
+        rest = scores[remaining]
+        if k < remaining.size:
+            # Everything tied with the k-th best comes along, so ties never straddle blocks.
+            kth = np.argpartition(-rest, k - 1)[k - 1]
+            take = rest >= rest[kth]
+        else:
+            take = np.ones(remaining.size, dtype=bool)
+        block = remaining[take]
+        for i in block[np.lexsort((block, -scores[block]))]:
+            yield items[i]
+        remaining = remaining[~take]
+        k *= 4
+
+
 def select_candidates(
     history: Sequence[Dict[str, Any]],
     max_history: int = 2000,
@@ -188,12 +329,11 @@ def select_candidates(
     for h in (history or [])[:max_history]:
         if not isinstance(h, dict):
             continue
-        host = canonical_host(h.get("host"))
-        title = clean_title_v2(h.get("title") or "")
+        host, info, tag = history_item_features(h)
+        title = info.title
         if not host or not title:
             continue
 
-        tag = detect_tag(host, title)
         if allowed_set and tag not in allowed_set:
             continue
 
@@ -212,14 +352,6 @@ def select_candidates(
 
     host_stats = build_host_stats(items)
 
-    scored: List[Tuple[float, Dict[str, Any]]] = []
-    for it in items:
-        s = score_item(it, host_stats)
-        if s > 0:
-            scored.append((s, it))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-
     per_host_cap = 3
     per_host_cap_allow = 8
 
@@ -227,7 +359,7 @@ def select_candidates(
     per_host: Dict[str, int] = {}
     seen: set[Tuple[str, str]] = set()
 
-    for _, it in scored:
+    for it in iter_ranked_items(items, host_stats, first_k=max_candidates * 2):
         key = (it["host"], it["title"].lower())
         if key in seen:
             continue
@@ -572,10 +704,7 @@ def make_rounds_ai(
         max_real_idx=max(0, len(compact) - 1),
     )
 
-    client = OpenAI(
-        base_url=getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
-        api_key=getenv("OPENROUTER_API_KEY") or getenv("OPENAI_API_KEY"),
-    )
+    client = get_openai_client()
 
     # If only one tag is allowed (very common), force it as the only valid topic.
     forced_tag: Optional[str] = allowed_tags[0] if len(allowed_tags) == 1 else None
@@ -774,12 +903,11 @@ def make_rounds(
             continue
         if not h.get("host") or not h.get("title"):
             continue
-        host = canonical_host(h.get("host"))
-        title = clean_title_v2(h.get("title") or "")
-        tag = detect_tag(host, title)
+        host, info, tag = history_item_features(h)
+        title = info.title
         if tag not in allowed_tags:
             continue
-        if is_generic_title(title):
+        if info.generic:
             continue
         valid_items.append({"host": host, "title": title, "tag": tag})
 
@@ -812,7 +940,7 @@ def make_rounds(
         truth1 = bucket.pop() if bucket else {"host": "?", "title": "?", "tag": tag}
         truth2 = bucket.pop() if bucket else {"host": "?", "title": "?", "tag": tag}
 
-        fake_text, fake_host = rng.choice(FAKE_TITLES)
+        fake_text, fake_host = rng.choice(get_fake_titles())
 
         # Sometimes make the lie mimic a real host (but not a real title)
         if rng.random() > 0.5 and bucket:
@@ -839,36 +967,120 @@ def make_rounds(
 # -----------------------------
 # Multiplayer roulette picks
 # -----------------------------
+# Roulette curation fans out one curator call per player on this shared pool;
+# players whose call misses the deadline get heuristic candidates instead.
+ROULETTE_CURATE_WORKERS = int(getenv("ROULETTE_CURATE_WORKERS", "8"))
+ROULETTE_CURATE_DEADLINE = float(getenv("ROULETTE_CURATE_DEADLINE", "30"))
+
+_curate_executor: Optional[ThreadPoolExecutor] = None
+_curate_executor_lock = threading.Lock()
+
+
+def get_curate_executor() -> ThreadPoolExecutor:
+    global _curate_executor
+    if _curate_executor is None:
+        with _curate_executor_lock:
+            if _curate_executor is None:
+                _curate_executor = ThreadPoolExecutor(
+                    max_workers=ROULETTE_CURATE_WORKERS, thread_name_prefix="roulette-curate"
+                )
+    return _curate_executor
+
+
+def weird_pool_size(count: int) -> int:
+    return max(count * 8, 60)
+
+
+def curate_weird_pool(
+    history: Sequence[Dict[str, Any]],
+    count: int = 3,
+    allowed_tags: Optional[Sequence[str]] = None,
+    seed: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Curator picks pick_weird_cards() draws from, or [] if the curator fails.
+    """
+    try:
+        return curate_history_ai(
+            history,
+            pick_n=weird_pool_size(count),
+            seed=seed,
+            allowed_tags=list(allowed_tags or [t["id"] for t in TAG_DEFS]),
+            meta={"mode": "roulette"},
+        )
+    except Exception:
+        return []
+
+
+def curate_weird_pools(
+    jobs: Sequence[Tuple[Sequence[Dict[str, Any]], Optional[str]]],
+    count: int = 3,
+    deadline: Optional[float] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Curator pools for each (history, seed) in `jobs`: one curate_players_ai() request
+    for all of them, or if that is over budget or fails, curate_weird_pool() per job
+    run concurrently so the wait is the slowest player rather than the sum. Pools
+    not ready `deadline` seconds after the first request come back as [] (heuristic
+    fallback in pick_weird_cards).
+    """
+    deadline = ROULETTE_CURATE_DEADLINE if deadline is None else deadline
+    executor = get_curate_executor()
+
+    if len(jobs) > 1:
+        # One combined curator request first; per player only if it can't be used.
+        started = time.monotonic()
+        batch = executor.submit(
+            curate_players_ai,
+            [history for history, _seed in jobs],
+            pick_n=weird_pool_size(count),
+            seed=jobs[0][1],
+            meta={"mode": "roulette"},
+        )
+        done, _pending = wait([batch], timeout=deadline)
+        if not done:
+            batch.cancel()
+            return [[] for _job in jobs]
+        pools = batch.result()
+        if pools is not None:
+            return pools
+        deadline = max(0.0, deadline - (time.monotonic() - started))
+
+    futures = [executor.submit(curate_weird_pool, history, count, None, seed) for history, seed in jobs]
+    done, _pending = wait(futures, timeout=deadline)
+    pools: List[List[Dict[str, Any]]] = []
+    for future in futures:
+        if future in done:
+            pools.append(future.result())
+        else:
+            # Still queued: drop it. Already running: it finishes in the background, unused.
+            future.cancel()
+            pools.append([])
+    return pools
+
+
 def pick_weird_cards(
     history: Sequence[Dict[str, Any]],
     count: int = 3,
     allowed_tags: Optional[Sequence[str]] = None,
     seed: Optional[str] = None,
+    pool: Optional[Sequence[Dict[str, Any]]] = None,
 ):
     """
     Return `count` spicy/unique history entries for a single player.
 
-    Prefers the two-stage curator to surface the strangest items, then
-    falls back to heuristic candidate selection. Always returns at
-    least `count` items by padding with canned fakes.
+    Prefers the two-stage curator to surface the strangest items (or the
+    already-curated `pool`, see curate_weird_pool), then falls back to
+    heuristic candidate selection. Always returns at least `count` items
+    by padding with canned fakes.
     """
 
     allowed_tags = list(allowed_tags or [t["id"] for t in TAG_DEFS])
     rng = random.Random(seed) if seed else random.Random()
-    max_pool = max(count * 8, 60)
+    max_pool = weird_pool_size(count)
 
-    pool: List[Dict[str, Any]] = []
-
-    try:
-        pool = curate_history_ai(
-            history,
-            pick_n=max_pool,
-            seed=seed,
-            allowed_tags=allowed_tags,
-            meta={"mode": "roulette"},
-        )
-    except Exception:
-        pool = []
+    if pool is None:
+        pool = curate_weird_pool(history, count=count, allowed_tags=allowed_tags, seed=seed)
 
     if not pool:
         pool = select_candidates(
@@ -901,7 +1113,7 @@ def pick_weird_cards(
     if len(cleaned) < count:
         needed = count - len(cleaned)
         for _ in range(needed):
-            fake_title, fake_host = rng.choice(FAKE_TITLES)
+            fake_title, fake_host = rng.choice(get_fake_titles())
             cleaned.append({
                 "host": canonical_host(fake_host),
                 "title": clean_title_v2(fake_title),
@@ -916,25 +1128,44 @@ def make_roulette_rounds(
     players: Sequence[Dict[str, Any]],
     picks_per_player: int = 3,
     seed: Optional[str] = None,
+    deadline: Optional[float] = None,
 ):
     """
     Build rounds for the multiplayer "whose history is this?" mode.
 
     Each player contributes `picks_per_player` cards; rounds are then
     shuffled so guessing players only see the cards, not the owner.
+    A player's "pool" (curate_weird_pool() output, e.g. computed when they joined
+    a room) is used as is; the others are curated together (curate_weird_pools)
+    within `deadline`.
     """
 
     rng = random.Random(seed) if seed else random.Random()
     rounds: List[Dict[str, Any]] = []
 
+    entries = []
     for idx, player in enumerate(players):
         player_id = player.get("id") or f"p{idx+1}"
         player_name = (player.get("name") or f"Player {idx+1}").strip() or f"Player {idx+1}"
-        history = player.get("history") or []
+        entries.append((player_id, player_name, player.get("history") or [], f"{seed or ''}-{player_id}"))
+
+    pools = [player.get("pool") for player in players]
+    pending = [i for i, pool in enumerate(pools) if pool is None]
+    if pending:
+        curated = curate_weird_pools(
+            [(entries[i][2], entries[i][3]) for i in pending],
+            count=picks_per_player,
+            deadline=deadline,
+        )
+        for i, pool in zip(pending, curated):
+            pools[i] = pool
+
+    for (player_id, player_name, history, player_seed), pool in zip(entries, pools):
         cards = pick_weird_cards(
             history,
             count=picks_per_player,
-            seed=f"{seed or ''}-{player_id}",
+            seed=player_seed,
+            pool=pool,
         )
         rounds.append({
             "player_id": player_id,
@@ -1011,11 +1242,12 @@ def normalize_curator_picks(
             continue
 
         host = canonical_host(h.get("host"))
-        title = clean_title_v2(h.get("title") or "")
+        info = analyze_title(h.get("title") or "")
+        title = info.title
         if not host or not title:
             continue
 
-        if is_generic_title(title):
+        if info.generic:
             continue
 
         tag = detect_tag(host, title)
@@ -1040,27 +1272,21 @@ def normalize_curator_picks(
 # -----------------------------
 # Stage 1: Curator AI
 # -----------------------------
-def curate_history_ai(
-    history: Sequence[Dict[str, Any]],
-    pick_n: int = 300,
-    seed: Optional[str] = None,
-    allowed_tags: Optional[Sequence[str]] = None,
-    meta: Optional[Dict[str, Any]] = None,
-) -> List[Dict[str, Any]]:
+def curator_model() -> str:
+    return getenv("CURATOR_MODEL", getenv("ROUND_MODEL", "gpt-5"))
+
+
+def curator_window(history: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Feed up to ~1000 raw history items, return curated REAL_ITEMS (~pick_n),
-    deduped + interesting.
+    The RAW_HISTORY_ITEMS the curator sees: first 1000 items, canonical host + cleaned title.
     """
-    allowed_tags = list(allowed_tags or [t["id"] for t in TAG_DEFS])
-    forced_tag: Optional[str] = allowed_tags[0] if len(allowed_tags) == 1 else None
-
     # Take a big window (stage 1’s job is to pick)
     raw: List[Dict[str, Any]] = []
     for h in (history or [])[:1000]:
         if not isinstance(h, dict):
             continue
-        host = canonical_host(h.get("host"))
-        title = clean_title_v2(h.get("title") or "")
+        host, info, _ = history_item_features(h, with_tag=False)
+        title = info.title
         if not host or not title:
             continue
         raw.append(
@@ -1071,32 +1297,89 @@ def curate_history_ai(
                 "lastVisitTime": h.get("lastVisitTime"),
             }
         )
+    return raw
+
+
+def curator_cache_key(
+    history: Sequence[Dict[str, Any]],
+    allowed_tags: Optional[Sequence[str]] = None,
+    pick_n: int = 300,
+    model: Optional[str] = None,
+) -> str:
+    """
+    Content hash of everything curate_history_ai() depends on except the seed:
+    the canonicalized history window, allowed tags, pick_n and the model name.
+    """
+    payload = {
+        "raw": curator_window(history),
+        "tags": sorted(set(allowed_tags or [t["id"] for t in TAG_DEFS])),
+        "pick_n": int(pick_n),
+        "model": model or curator_model(),
+    }
+    blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def heuristic_curated_items(
+    history: Sequence[Dict[str, Any]],
+    pick_n: int,
+    allowed_tags: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """select_candidates() output in the REAL_ITEMS format the curator returns."""
+    cands = select_candidates(history, max_history=1000, max_candidates=pick_n, allowed_tags=allowed_tags)
+    out = []
+    seen = set()
+    for it in cands:
+        host = canonical_host(it["host"])
+        title = clean_title_v2(it["title"])
+        tag = it.get("tag") or detect_tag(host, title)
+        pair = (host, title)
+        if pair in seen:
+            continue
+        seen.add(pair)
+        out.append({"id": len(out), "host": host, "title": title, "tag": tag})
+        if len(out) >= pick_n:
+            break
+    return out
+
+
+def curate_history_ai(
+    history: Sequence[Dict[str, Any]],
+    pick_n: int = 300,
+    seed: Optional[str] = None,
+    allowed_tags: Optional[Sequence[str]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Feed up to ~1000 raw history items, return curated REAL_ITEMS (~pick_n),
+    deduped + interesting.
+    """
+    return curate_history_ai_checked(history, pick_n, seed, allowed_tags, meta)[0]
+
+
+def curate_history_ai_checked(
+    history: Sequence[Dict[str, Any]],
+    pick_n: int = 300,
+    seed: Optional[str] = None,
+    allowed_tags: Optional[Sequence[str]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    curate_history_ai() plus whether the result may be cached: False when the
+    model's answer was unusable and heuristic picks stand in for it.
+    """
+    allowed_tags = list(allowed_tags or [t["id"] for t in TAG_DEFS])
+    forced_tag: Optional[str] = allowed_tags[0] if len(allowed_tags) == 1 else None
+
+    raw = curator_window(history)
 
     if len(raw) < 50:
-        # too little data, fall back to heuristic candidates
-        cands = select_candidates(history, max_history=1000, max_candidates=pick_n, allowed_tags=allowed_tags)
-        # convert to REAL_ITEMS format
-        out = []
-        seen = set()
-        for it in cands:
-            host = canonical_host(it["host"])
-            title = clean_title_v2(it["title"])
-            tag = it.get("tag") or detect_tag(host, title)
-            pair = (host, title)
-            if pair in seen:
-                continue
-            seen.add(pair)
-            out.append({"id": len(out), "host": host, "title": title, "tag": tag})
-            if len(out) >= pick_n:
-                break
-        return out
+        # too little data, fall back to heuristic candidates (deterministic, so cacheable)
+        return heuristic_curated_items(history, pick_n, allowed_tags), True
 
     schema = build_curator_json_schema(max_pick=pick_n)
 
-    client = OpenAI(
-        base_url=getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
-        api_key=getenv("OPENROUTER_API_KEY") or getenv("OPENAI_API_KEY"),
-    )
+    client = get_openai_client()
 
     system = (
         "You are a curator for a party game called 'Search History Court'.\n"
@@ -1136,7 +1419,7 @@ def curate_history_ai(
 
     try:
         resp = client.chat.completions.create(
-            model=getenv("CURATOR_MODEL", getenv("ROUND_MODEL", "gpt-5")),
+            model=curator_model(),
             messages=[
                 {"role": "system", "content": system},
                 {"role": "user", "content": json.dumps(user, ensure_ascii=False)},
@@ -1154,7 +1437,7 @@ def curate_history_ai(
         used_schema = False
         # fallback JSON mode
         resp = client.chat.completions.create(
-            model=getenv("CURATOR_MODEL", getenv("ROUND_MODEL", "gpt-5")),
+            model=curator_model(),
             messages=[
                 {"role": "system", "content": system},
                 {"role": "user", "content": json.dumps(user, ensure_ascii=False)},
@@ -1177,7 +1460,7 @@ def curate_history_ai(
             {"curated_len": len(curated)},
             None,
         )
-        return curated
+        return curated, True
     except Exception as e:
         log_ai_run(
             meta or {},
@@ -1186,22 +1469,155 @@ def curate_history_ai(
             None,
             e,
         )
-        # fallback to heuristic selection
-        cands = select_candidates(history, max_history=1000, max_candidates=pick_n, allowed_tags=allowed_tags)
-        out = []
-        seen = set()
-        for it in cands:
-            host = canonical_host(it["host"])
-            title = clean_title_v2(it["title"])
-            tag = it.get("tag") or detect_tag(host, title)
-            pair = (host, title)
-            if pair in seen:
-                continue
-            seen.add(pair)
-            out.append({"id": len(out), "host": host, "title": title, "tag": tag})
-            if len(out) >= pick_n:
-                break
-        return out
+        # fallback to heuristic selection; not what the model picked, so not cacheable
+        return heuristic_curated_items(history, pick_n, allowed_tags), False
+
+
+# Multi-player curator (roulette): one request for every player's candidates.
+# Each player sends at most CURATOR_BATCH_PLAYER_ITEMS heuristic candidates; past
+# CURATOR_BATCH_MAX_TOKENS (estimated prompt size) callers curate per player instead.
+CURATOR_BATCH_PLAYER_ITEMS = int(getenv("CURATOR_BATCH_PLAYER_ITEMS", "250"))
+CURATOR_BATCH_MAX_TOKENS = int(getenv("CURATOR_BATCH_MAX_TOKENS", "40000"))
+
+
+def build_batch_curator_json_schema(n_players: int, max_pick: int) -> Dict[str, Any]:
+    """
+    Output:
+      { "players": [ { "player": int, "picks": [ { "idx": int }, ... ] }, ... ] }
+
+    player indexes PLAYERS; idx indexes that player's ITEMS.
+    """
+    return {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["players"],
+        "properties": {
+            "players": {
+                "type": "array",
+                "maxItems": n_players,
+                "items": {
+                    "type": "object",
+                    "additionalProperties": False,
+                    "required": ["player", "picks"],
+                    "properties": {
+                        "player": {"type": "integer", "minimum": 0, "maximum": n_players - 1},
+                        "picks": {
+                            "type": "array",
+                            "maxItems": max_pick,
+                            "items": {
+                                "type": "object",
+                                "additionalProperties": False,
+                                "required": ["idx"],
+                                "properties": {"idx": {"type": "integer", "minimum": 0}},
+                            },
+                        },
+                    },
+                },
+            }
+        },
+    }
+
+
+def curate_players_ai(
+    histories: Sequence[Sequence[Dict[str, Any]]],
+    pick_n: int = 60,
+    seed: Optional[str] = None,
+    allowed_tags: Optional[Sequence[str]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> Optional[List[List[Dict[str, Any]]]]:
+    """
+    Curate several players' histories in one structured-output request: each
+    player's select_candidates() list, packed as [host, title] pairs under its
+    player index, behind one shared prompt. Returns one curated REAL_ITEMS list
+    per history ([] for a player with too few usable picks), or None when the
+    prompt would exceed CURATOR_BATCH_MAX_TOKENS or the request fails, so the
+    caller can fall back to curate_history_ai() per player.
+    """
+    allowed_tags = list(allowed_tags or [t["id"] for t in TAG_DEFS])
+    candidates = [
+        select_candidates(h, max_history=1000, max_candidates=CURATOR_BATCH_PLAYER_ITEMS, allowed_tags=allowed_tags)
+        for h in histories
+    ]
+
+    system = (
+        "You are a curator for a party game called 'Search History Court'.\n"
+        "You will be given PLAYERS, each with ITEMS: that player's browsing history as [host, title] pairs.\n"
+        "Your job: for EACH player, pick the MOST interesting, specific, tease-able entries.\n\n"
+        "RULES:\n"
+        "- Return ONLY JSON matching the schema, with one entry per player index.\n"
+        "- Select up to pick_n items per player by their index in that player's ITEMS.\n"
+        "- Prioritize weird/specific/quirky/embarrassing/incriminating titles over generic pages.\n"
+        "- Prefer diversity across hosts within each player.\n"
+        "- Avoid generic titles: login, home, index, new tab, security checks.\n"
+        "- Do NOT invent new hosts/titles; ONLY pick indices.\n"
+    )
+    user = {
+        "pick_n": pick_n,
+        "seed": seed or "",
+        "selected_tags": allowed_tags,
+        "tag_definitions": TAG_DEFS,
+        "PLAYERS": [
+            {"player": i, "ITEMS": [[it["host"], it["title"]] for it in cands]}
+            for i, cands in enumerate(candidates)
+        ],
+    }
+    user_json = json.dumps(user, ensure_ascii=False)
+
+    request_payload = {
+        "stage": "curator_batch",
+        "pick_n": pick_n,
+        "seed": seed,
+        "players": [len(c) for c in candidates],
+        "allowed_tags": allowed_tags,
+    }
+
+    # ~4 characters per token is close enough for a budget check.
+    est_tokens = (len(system) + len(user_json)) // 4
+    if est_tokens > CURATOR_BATCH_MAX_TOKENS:
+        log_ai_run(meta or {}, {**request_payload, "est_tokens": est_tokens}, None, None, ValueError("over token budget"))
+        return None
+
+    parsed: Any = None
+    try:
+        resp = get_openai_client().chat.completions.create(
+            model=curator_model(),
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user_json},
+                {"role": "user", "content": "Return ONLY valid JSON."},
+            ],
+            temperature=0.5,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "historycourt_curator_batch",
+                    "strict": True,
+                    "schema": build_batch_curator_json_schema(len(candidates), pick_n),
+                },
+            },
+        )
+        parsed = json.loads(resp.choices[0].message.content or "{}")
+        if not isinstance(parsed, dict) or not isinstance(parsed.get("players"), list):
+            raise ValueError("Batch curator output must be object with players[]")
+    except Exception as e:
+        log_ai_run(meta or {}, request_payload, parsed, None, e)
+        return None
+
+    picks_by_player: Dict[int, Any] = {}
+    for entry in parsed["players"]:
+        if isinstance(entry, dict) and isinstance(entry.get("player"), int):
+            picks_by_player.setdefault(entry["player"], entry.get("picks"))
+
+    pools: List[List[Dict[str, Any]]] = []
+    for i, cands in enumerate(candidates):
+        try:
+            pools.append(
+                normalize_curator_picks({"picks": picks_by_player.get(i)}, cands, allowed_tags=allowed_tags, max_pick=pick_n)
+            )
+        except ValueError:
+            pools.append([])
+    log_ai_run(meta or {}, request_payload, parsed, {"curated_len": [len(p) for p in pools]}, None)
+    return pools
 
 
 # -----------------------------
@@ -1261,7 +1677,7 @@ def make_rounds_ai_from_real_items(
             truth1 = bucket.pop()
             truth2 = bucket.pop() if bucket else truth1
 
-            fake_text, fake_host = rng.choice(FAKE_TITLES)
+            fake_text, fake_host = rng.choice(get_fake_titles())
             lie = {"host": canonical_host(fake_host), "title": clean_title_v2(fake_text), "is_lie": True, "tag": tag}
             cards = [
                 {"host": truth1["host"], "title": truth1["title"], "is_lie": False, "tag": tag},
@@ -1280,10 +1696,7 @@ def make_rounds_ai_from_real_items(
         max_real_idx=max(0, len(compact) - 1),
     )
 
-    client = OpenAI(
-        base_url=getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
-        api_key=getenv("OPENROUTER_API_KEY") or getenv("OPENAI_API_KEY"),
-    )
+    client = get_openai_client()
 
     forced_tag: Optional[str] = allowed_tags[0] if len(allowed_tags) == 1 else None
 
@@ -1,7 +1,15 @@
 import csv
+import hashlib
+import json
 import os
+import re
+import threading
 from os import getenv
 
+from titles import analyze_title
+from typemap import open_type_map_artifact
+from utils import LRUCache
+
 # Tagging (6 perspectives)
 TAG_MIN_COUNT = 30
 TAG_DEFS = [
@@ -62,6 +70,8 @@ TAG_DEFS = [
     },
 ]
 TAG_LOOKUP = {t["id"]: t for t in TAG_DEFS}
+# detect_tag() result when neither the type map nor the heuristics match
+FALLBACK_TAG = "shopping_misc"
 
 TYPE_TO_TAG = {
     "Social_Network": "social",
@@ -94,6 +104,8 @@ TYPE_TO_TAG = {
     "type": "shopping_misc",  # header guard
 }
 TYPE_MAP_PATH = getenv("TYPE_MAP_PATH", os.path.join(os.path.dirname(__file__), "types.csv"))
+TYPE_MAP_BIN_PATH = getenv("TYPE_MAP_BIN_PATH", os.path.splitext(TYPE_MAP_PATH)[0] + ".bin")
+HOST_TAG_CACHE_SIZE = int(getenv("HOST_TAG_CACHE_SIZE", "8192"))
 
 
 def canonical_host(host: str) -> str:
@@ -103,7 +115,7 @@ def canonical_host(host: str) -> str:
     return h
 
 
-def load_type_map(path=TYPE_MAP_PATH):
+def read_type_map_csv(path=TYPE_MAP_PATH):
     mapping = {}
     if not path or not os.path.exists(path):
         return mapping
@@ -120,7 +132,104 @@ def load_type_map(path=TYPE_MAP_PATH):
     return mapping
 
 
-TYPE_MAP = load_type_map()
+def load_type_map(path=TYPE_MAP_PATH, bin_path=TYPE_MAP_BIN_PATH):
+    """
+    Prefer the compiled, memory-mapped artifact (see typemap.py); parse the CSV
+    when the artifact is missing or older than the CSV.
+    """
+    mapped = open_type_map_artifact(bin_path, path)
+    if mapped is not None:
+        return mapped
+    return read_type_map_csv(path)
+
+
+# Loaded on first use so importing the app (and forking workers) stays cheap;
+# call get_type_map() from a pre-fork hook to load it once in the parent.
+_TYPE_MAP = None
+_TYPE_MAP_LOCK = threading.Lock()
+
+
+def get_type_map():
+    global _TYPE_MAP
+    if _TYPE_MAP is None:
+        with _TYPE_MAP_LOCK:
+            if _TYPE_MAP is None:
+                _TYPE_MAP = load_type_map()
+    return _TYPE_MAP
+
+
+def __getattr__(name):
+    # Keep `tagging.TYPE_MAP` working for callers that predate get_type_map().
+    if name == "TYPE_MAP":
+        return get_type_map()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def compile_tag_matchers(tag_defs):
+    """
+    One (tag_id, host_regex, keyword_regex) per tag, in TAG_DEFS order, so the
+    heuristic pass is two regex searches per tag instead of a substring scan per pattern.
+    """
+    def _alternation(words):
+        if not words:
+            return None
+        return re.compile("|".join(re.escape(w) for w in words))
+
+    return [
+        (tag["id"], _alternation(tag["hosts"]), _alternation(tag["keywords"]))
+        for tag in tag_defs
+    ]
+
+
+TAG_MATCHERS = compile_tag_matchers(TAG_DEFS)
+
+# canonical host -> host-only part of detect_tag, shared by every request in the process
+HOST_TAG_CACHE = LRUCache(HOST_TAG_CACHE_SIZE)
+
+
+def host_tag_cache_stats():
+    return HOST_TAG_CACHE.stats()
+
+
+def clear_host_tag_cache():
+    HOST_TAG_CACHE.clear()
+
+
+def reload_type_map(path=TYPE_MAP_PATH, bin_path=TYPE_MAP_BIN_PATH):
+    """
+    Swap in a freshly loaded type map and drop every cached host decision
+    made against the old one. Callers should go through get_type_map().
+    """
+    global _TYPE_MAP, _TAGGER_VERSION
+    with _TYPE_MAP_LOCK:
+        _TYPE_MAP = load_type_map(path, bin_path)
+        _TAGGER_VERSION = None
+    clear_host_tag_cache()
+    return len(_TYPE_MAP)
+
+
+_TAGGER_VERSION = None
+
+
+def tagger_version():
+    """
+    Hash of everything detect_tag() depends on (type map, TYPE_TO_TAG, TAG_DEFS,
+    fallback tag). Clients that classify with /api/type-map echo it back on upload
+    so their tags can be trusted; it changes whenever the type map is reloaded.
+    """
+    global _TAGGER_VERSION
+    version = _TAGGER_VERSION
+    if version is None:
+        type_map = get_type_map()
+        h = hashlib.sha256()
+        h.update(json.dumps([TAG_DEFS, TYPE_TO_TAG, FALLBACK_TAG], sort_keys=True).encode("utf-8"))
+        for host, host_type in sorted(type_map.items()):
+            h.update(f"{host}\t{host_type}\n".encode("utf-8"))
+        version = h.hexdigest()[:16]
+        with _TYPE_MAP_LOCK:
+            if _TYPE_MAP is type_map:
+                _TAGGER_VERSION = version
+    return version
 
 
 def lookup_host_type(host: str):
@@ -132,32 +241,48 @@ def lookup_host_type(host: str):
     if len(parts) >= 3:
         root = ".".join(parts[-2:])
         candidates.append(root)
+    type_map = get_type_map()
     for cand in candidates:
-        if cand in TYPE_MAP:
-            return TYPE_MAP[cand]
+        host_type = type_map.get(cand)
+        if host_type is not None:
+            return host_type
     return None
 
 
+def resolve_host(h: str):
+    """
+    Host-only part of detect_tag for a canonical host: (type-map tag or None,
+    index into TAG_MATCHERS of the first heuristic host hit, or len(TAG_MATCHERS)).
+    """
+    host_type = lookup_host_type(h)
+    tag = TYPE_TO_TAG.get(host_type) if host_type else None
+    if tag:
+        return tag, None
+
+    for i, (_tag_id, host_re, _keyword_re) in enumerate(TAG_MATCHERS):
+        if host_re is not None and host_re.search(h):
+            return None, i
+    return None, len(TAG_MATCHERS)
+
+
 def detect_tag(host: str, title: str) -> str:
     """
     Assign an item to one of the defined perspectives using the CSV type map first,
     then host/keyword heuristics. Falls back to shopping_misc so nothing is lost.
     """
     h = canonical_host(host)
-    t = (title or "").lower()
-
-    host_type = lookup_host_type(h)
-    if host_type:
-        tag = TYPE_TO_TAG.get(host_type)
-        if tag:
-            return tag
+    tag, host_hit = HOST_TAG_CACHE.get_or_compute(h, resolve_host)
+    if tag:
+        return tag
 
-    for tag in TAG_DEFS:
-        if any(p in h for p in tag["hosts"]):
-            return tag["id"]
-        if any(kw in t for kw in tag["keywords"]):
-            return tag["id"]
-    return "shopping_misc"
+    # Only title keywords of tags ordered before the first host hit can still win.
+    t = (title or "").lower()
+    for tag_id, _host_re, keyword_re in TAG_MATCHERS[:host_hit]:
+        if keyword_re is not None and keyword_re.search(t):
+            return tag_id
+    if host_hit < len(TAG_MATCHERS):
+        return TAG_MATCHERS[host_hit][0]
+    return FALLBACK_TAG
 
 
 def filter_history_by_tags(history, selected_tags):
@@ -186,26 +311,55 @@ def filter_history_by_tags(history, selected_tags):
     return filtered
 
 
-def tag_history_items(history, max_history=5000):
+def item_features(host, title, tag=None):
+    """
+    Per-item inputs of the round generators, computed once when history is stored:
+    cleaned title, tag of the cleaned title, generic flag and word count.
+    `host` must already be canonical; `tag` is detect_tag(host, title) if known.
+    """
+    info = analyze_title(title)
+    return {
+        "cleanTitle": info.title,
+        "cleanTag": tag if tag is not None and info.title == title else detect_tag(host, info.title),
+        "generic": info.generic,
+        "words": info.words,
+    }
+
+
+def tag_history_item(h, features=False, trusted_tag=None):
+    """
+    One raw history item with inferred tag and canonical host (plus item_features()
+    when `features` is set), or None if it has no usable host/title.
+    `trusted_tag` skips detect_tag() for a tag the client already computed.
+    """
+    if not isinstance(h, dict):
+        return None
+    host = canonical_host(h.get("host"))
+    title = (h.get("title") or "").strip()
+    if not host or not title:
+        return None
+    item = {
+        "host": host,
+        "title": title,
+        "tag": trusted_tag or detect_tag(host, title),
+        "lastVisitTime": h.get("lastVisitTime"),
+        "visitCount": int(h.get("visitCount") or 1),
+    }
+    if features:
+        item.update(item_features(host, title, item["tag"]))
+    return item
+
+
+def tag_history_items(history, max_history=5000, features=False):
     """
-    Returns a list of items with inferred tag and canonical host.
+    Returns a list of items with inferred tag and canonical host,
+    plus item_features() when `features` is set.
     """
     out = []
     for h in (history or [])[:max_history]:
-        if not isinstance(h, dict):
-            continue
-        host = canonical_host(h.get("host"))
-        title = (h.get("title") or "").strip()
-        if not host or not title:
-            continue
-        tag = detect_tag(host, title)
-        out.append({
-            "host": host,
-            "title": title,
-            "tag": tag,
-            "lastVisitTime": h.get("lastVisitTime"),
-            "visitCount": int(h.get("visitCount") or 1),
-        })
+        item = tag_history_item(h, features)
+        if item is not None:
+            out.append(item)
     return out
 
 
@@ -213,19 +367,29 @@ def summarize_items_by_tag(items, max_hosts=None):
     """
     Summaries for review UI: counts per tag + top hosts per tag.
     """
-    tag_counts = {t["id"]: 0 for t in TAG_DEFS}
-    host_counts = {t["id"]: {} for t in TAG_DEFS}
+    host_counts = {}
     for it in items:
-        tag = it.get("tag") or "shopping_misc"
-        host = it.get("host") or "unknown"
-        tag_counts[tag] = tag_counts.get(tag, 0) + 1
-        hc = host_counts.setdefault(tag, {})
-        hc[host] = hc.get(host, 0) + 1
+        key = (it.get("tag") or "shopping_misc", it.get("host") or "unknown")
+        host_counts[key] = host_counts.get(key, 0) + 1
+    rows = sorted(host_counts.items(), key=lambda x: x[1], reverse=True)
+    return summarize_tag_host_counts(((tag, host, n) for (tag, host), n in rows), max_hosts=max_hosts)
+
+
+def summarize_tag_host_counts(rows, max_hosts=None):
+    """
+    Same summary as summarize_items_by_tag, built from (tag, host, count) rows
+    already ordered by count desc (e.g. a GROUP BY over stored history items).
+    """
+    tag_counts = {t["id"]: 0 for t in TAG_DEFS}
+    host_counts = {t["id"]: [] for t in TAG_DEFS}
+    for tag, host, count in rows:
+        tag = tag or "shopping_misc"
+        tag_counts[tag] = tag_counts.get(tag, 0) + count
+        host_counts.setdefault(tag, []).append((host or "unknown", count))
 
     summary = []
     for tag in TAG_DEFS:
-        hosts = host_counts.get(tag["id"], {})
-        sorted_hosts = sorted(hosts.items(), key=lambda x: x[1], reverse=True)
+        sorted_hosts = host_counts.get(tag["id"], [])
         if max_hosts:
             sorted_hosts = sorted_hosts[:max_hosts]
         summary.append({
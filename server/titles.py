@@ -0,0 +1,93 @@
+# titles.py
+#
+# Page-title normalization shared by candidate selection, round generation and scoring.
+# Every regex is compiled once at import; analyze_title() does cleaning, the
+# generic-title check and word counting in one pass and caches the result per raw title.
+
+from __future__ import annotations
+
+import re
+from os import getenv
+from typing import List, NamedTuple
+
+from utils import LRUCache
+
+GENERIC_TITLE_PATTERNS: List[str] = [
+    r"^new tab$",
+    r"^home$",
+    r"^homepage$",
+    r"sign in",
+    r"log in",
+    r"login",
+    r"account",
+    r"verify",
+    r"security",
+    r"welcome",
+    r"index of",
+]
+
+# All generic patterns as one alternation: one scan per title instead of one per pattern.
+GENERIC_TITLE_RE = re.compile("|".join(f"(?:{p})" for p in GENERIC_TITLE_PATTERNS))
+# Trailing site decorations like " - YouTube" or " • Something"
+DECORATION_RE = re.compile(r"\s[-|\u2022]\s.*$")
+LEGACY_SUFFIX_RE = re.compile(r"\s-.*")
+WHITESPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"[a-zA-Z0-9]{3,}")
+
+TITLE_CACHE_SIZE = int(getenv("TITLE_CACHE_SIZE", "16384"))
+
+
+class TitleInfo(NamedTuple):
+    title: str  # clean_title_v2() output
+    generic: bool  # is_generic_title(title)
+    words: int  # alphanumeric tokens of 3+ chars in title
+
+
+def clean_title_v2(title: str) -> str:
+    """Stronger cleaner used for candidate selection + canonicalization."""
+    if not title:
+        return "Untitled"
+    title = DECORATION_RE.sub("", title.strip()).strip()
+    title = WHITESPACE_RE.sub(" ", title).strip()
+    if len(title) > 90:
+        title = title[:87] + "..."
+    return title or "Untitled"
+
+
+def clean_title(title: str) -> str:
+    """Legacy short cleaner used by the fallback generator."""
+    if not title:
+        return "Untitled Page"
+    title = LEGACY_SUFFIX_RE.sub("", title).strip()
+    title = WHITESPACE_RE.sub(" ", title).strip()
+    return title[:65] + "..." if len(title) > 65 else (title or "Untitled Page")
+
+
+def is_generic_title(title: str) -> bool:
+    if not title:
+        return True
+    t = title.strip().lower()
+    return len(t) <= 3 or GENERIC_TITLE_RE.search(t) is not None
+
+
+def _analyze(raw: str) -> TitleInfo:
+    title = clean_title_v2(raw)
+    lower = title.lower()
+    # title is already stripped, so lower needs no further normalization for the generic check
+    generic = len(lower) <= 3 or GENERIC_TITLE_RE.search(lower) is not None
+    return TitleInfo(title, generic, len(WORD_RE.findall(lower)))
+
+
+# raw title -> TitleInfo, shared by every request in the process
+TITLE_CACHE = LRUCache(TITLE_CACHE_SIZE)
+
+
+def analyze_title(raw: str) -> TitleInfo:
+    """
+    clean_title_v2(raw), is_generic_title() of the result and its word count, computed together.
+    """
+    return TITLE_CACHE.get_or_compute(raw or "", _analyze)
+
+
+def title_cache_stats():
+    return TITLE_CACHE.stats()
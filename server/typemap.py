@@ -0,0 +1,143 @@
+"""
+Compact, memory-mapped host -> type map compiled from types.csv.
+
+Layout (little endian):
+  header   magic, csv size, csv mtime_ns, n_types, n_hosts, types_len
+  types    "\n"-joined type names
+  index    n_hosts x (blob offset u32, host length u16, type index u16), sorted by host bytes
+  blob     concatenated utf-8 hosts
+
+The file is opened read-only with mmap, so every worker shares the same page
+cache instead of holding its own dict of 30k strings. Lookups binary-search
+the index.
+
+Build (from server/): python typemap.py
+"""
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+MAGIC = b"HCTMAP01"
+_HEADER = struct.Struct("<8sQQIII")
+_ENTRY = struct.Struct("<IHH")
+
+
+def source_signature(source_path):
+    """(size, mtime_ns) of the CSV the artifact was built from, or None if missing."""
+    try:
+        st = os.stat(source_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def write_type_map_artifact(mapping, out_path, source_path):
+    """
+    Serialize a {host: type} mapping. Stamped with the source CSV size/mtime
+    so stale artifacts are detected on open.
+    """
+    size, mtime_ns = source_signature(source_path) or (0, 0)
+    types = sorted(set(mapping.values()))
+    type_idx = {t: i for i, t in enumerate(types)}
+    types_blob = "\n".join(types).encode("utf-8")
+
+    entries = sorted((host.encode("utf-8"), type_idx[t]) for host, t in mapping.items())
+    index = bytearray()
+    blob = bytearray()
+    for host_b, t in entries:
+        index += _ENTRY.pack(len(blob), len(host_b), t)
+        blob += host_b
+
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, size, mtime_ns, len(types), len(entries), len(types_blob)))
+        f.write(types_blob)
+        f.write(index)
+        f.write(blob)
+    os.replace(tmp_path, out_path)
+    return len(entries)
+
+
+def open_type_map_artifact(path, source_path):
+    """
+    Returns a MappedTypeMap, or None when the artifact is missing, malformed,
+    or older than the CSV it was compiled from.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, size, mtime_ns, n_types, n_hosts, types_len = _HEADER.unpack_from(mm, 0)
+    except struct.error:
+        mm.close()
+        return None
+    signature = source_signature(source_path)
+    if magic != MAGIC or (signature is not None and signature != (size, mtime_ns)):
+        mm.close()
+        return None
+    return MappedTypeMap(mm, n_types, n_hosts, types_len)
+
+
+class MappedTypeMap(Mapping):
+    """Read-only {host: type} view over a compiled artifact."""
+
+    def __init__(self, mm, n_types, n_hosts, types_len):
+        self._mm = mm
+        self._n = n_hosts
+        types_off = _HEADER.size
+        raw_types = mm[types_off:types_off + types_len].decode("utf-8")
+        self._types = raw_types.split("\n") if n_types else []
+        self._index_off = types_off + types_len
+        self._blob_off = self._index_off + n_hosts * _ENTRY.size
+
+    def _entry(self, i):
+        off, length, t = _ENTRY.unpack_from(self._mm, self._index_off + i * _ENTRY.size)
+        start = self._blob_off + off
+        return self._mm[start:start + length], t
+
+    def _find(self, host):
+        key = host.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cur, t = self._entry(mid)
+            if cur < key:
+                lo = mid + 1
+            elif cur > key:
+                hi = mid
+            else:
+                return t
+        return -1
+
+    def __getitem__(self, host):
+        t = self._find(host) if isinstance(host, str) else -1
+        if t < 0:
+            raise KeyError(host)
+        return self._types[t]
+
+    def __contains__(self, host):
+        return isinstance(host, str) and self._find(host) >= 0
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._entry(i)[0].decode("utf-8")
+
+    def items(self):
+        for i in range(self._n):
+            host_b, t = self._entry(i)
+            yield host_b.decode("utf-8"), self._types[t]
+
+    def __len__(self):
+        return self._n
+
+
+if __name__ == "__main__":
+    from tagging import TYPE_MAP_BIN_PATH, TYPE_MAP_PATH, read_type_map_csv
+
+    n = write_type_map_artifact(read_type_map_csv(TYPE_MAP_PATH), TYPE_MAP_BIN_PATH, TYPE_MAP_PATH)
+    print(f"wrote {n} hosts to {TYPE_MAP_BIN_PATH} ({os.path.getsize(TYPE_MAP_BIN_PATH)} bytes)")
@@ -1,5 +1,8 @@
 import random
 import string
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 
 
@@ -10,3 +13,147 @@ def gen_id(n=10):
 
 def utc_now_iso():
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU with hit/miss/eviction counters.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = max(1, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        value = compute(key)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class TTLCache:
+    """
+    Thread-safe LRU whose entries also expire after `ttl` seconds and whose
+    total size is capped at `max_bytes` (each value's size is supplied by the caller).
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=120.0):
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl = float(ttl)
+        self._data = OrderedDict()  # key -> (expires_at, nbytes, value)
+        # key -> [loads in flight, generation]; invalidate() bumps the generation so a
+        # load that started before it doesn't insert what it read.
+        self._loads = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, key):
+        _expires, nbytes, _value = self._data.pop(key)
+        self._bytes -= nbytes
+
+    def _end_load(self, key):
+        """Count one load of key as finished; returns the key's current generation."""
+        state = self._loads[key]
+        state[0] -= 1
+        if not state[0]:
+            del self._loads[key]
+        return state[1]
+
+    def get_or_load(self, key, load):
+        """
+        Cached value for key, or load() -> (value, nbytes). A None value from
+        load() means "not found" and is not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._drop(key)
+                self.expirations += 1
+            self.misses += 1
+            state = self._loads.setdefault(key, [0, 0])
+            state[0] += 1
+            generation = state[1]
+        try:
+            value, nbytes = load()
+        except BaseException:
+            with self._lock:
+                self._end_load(key)
+            raise
+        with self._lock:
+            stale = self._end_load(key) != generation
+            if value is not None and nbytes <= self.max_bytes and not stale:
+                if key in self._data:
+                    self._drop(key)
+                self._data[key] = (now + self.ttl, nbytes, value)
+                self._bytes += nbytes
+                while self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._data)))
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            if key in self._loads:
+                self._loads[key][1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            for state in self._loads.values():
+                state[1] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }